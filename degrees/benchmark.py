@@ -0,0 +1,308 @@
+"""
+Benchmarks loading, name resolution and shortest_path queries on a dataset,
+optionally generating a synthetic one first.
+
+Usage: python benchmark.py [directory] [queries] [--generate PEOPLE MOVIES]
+       [--stars N] [--power-law] [--seed N] [--bidirectional] [--compact]
+       [--cache] [--index] [--memory] [--json OUTPUT] [--compare BASELINE]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+import degrees
+
+# Shortest path lengths that queries are grouped by
+DISTANCES = range(1, 7)
+
+# Syllables that generated names are made of
+SYLLABLES = ["ka", "ve", "lin", "bo", "ra", "son", "mi", "chel", "an", "der", "ton", "li",
+             "sa", "mar", "tin", "jo", "han", "sen", "el", "ri", "co", "ber", "ta", "wen"]
+
+
+def generate(directory, n_people, n_movies, stars_per_movie=4, power_law=False, seed=0):
+    """
+    Writes a synthetic people.csv, movies.csv and stars.csv into `directory`,
+    in the layout load_data expects. Each movie has `stars_per_movie` stars,
+    picked uniformly or, with `power_law`, with Zipf-like weights so a few
+    people star in a great many movies.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    def word():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).title()
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(n_people):
+            writer.writerow([person, f"{word()} {word()}", rng.randint(1920, 2010)])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(n_movies):
+            writer.writerow([movie, f"The {word()} {word()}", rng.randint(1930, 2020)])
+
+    if power_law:
+        weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(n_people)))
+    stars_per_movie = min(stars_per_movie, n_people)
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(n_movies):
+            if power_law:
+                stars = set()
+                while len(stars) < stars_per_movie:
+                    stars.update(rng.choices(range(n_people), cum_weights=weights, k=stars_per_movie - len(stars)))
+            else:
+                stars = rng.sample(range(n_people), stars_per_movie)
+            writer.writerows([person, movie] for person in stars)
+
+
+def time_queries(pairs, search=degrees.shortest_path):
+    """
+    Runs `search` for every (source, target) pair and returns
+    a list of (seconds, degrees) tuples, where degrees is None if the
+    pair isn't connected.
+    """
+    timings = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = search(source, target)
+        elapsed = time.perf_counter() - start
+        timings.append((elapsed, None if path is None else len(path)))
+    return timings
+
+
+def bucketed_pairs(per_bucket, seed=0, max_sources=20):
+    """
+    Returns a dictionary mapping each distance in DISTANCES to up to
+    `per_bucket` (source, target) pairs that are that many degrees apart,
+    found by searching outward from random sources.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    buckets = {distance: [] for distance in DISTANCES}
+    for _ in range(max_sources):
+        source = rng.choice(person_ids)
+        by_distance = {}
+        for person_id, distance in degrees.distances_from(source).items():
+            if distance in buckets:
+                by_distance.setdefault(distance, []).append(person_id)
+        for distance, targets in by_distance.items():
+            wanted = per_bucket - len(buckets[distance])
+            targets.sort()
+            buckets[distance].extend((source, target) for target in rng.sample(targets, min(wanted, len(targets))))
+        if all(len(pairs) >= per_bucket for pairs in buckets.values()):
+            break
+    return buckets
+
+
+def summarize(seconds):
+    """
+    Returns latency statistics, in milliseconds, for a list of durations.
+    """
+    if not seconds:
+        return {"count": 0}
+    latencies = sorted(s * 1000 for s in seconds)
+    return {
+        "count": len(latencies),
+        "mean_ms": statistics.mean(latencies),
+        "median_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "max_ms": latencies[-1]
+    }
+
+
+def time_names(count, seed=0):
+    """
+    Times resolve_names on exact, prefix and misspelt forms of random
+    people's names, returning the index build time and a summary of each.
+    """
+    rng = random.Random(seed)
+    sample = rng.sample(sorted(degrees.names), min(count, len(degrees.names)))
+
+    start = time.perf_counter()
+    degrees.resolve_names("")
+    results = {"index_seconds": time.perf_counter() - start}
+
+    queries = {
+        "exact": sample,
+        "prefix": [name[:max(1, len(name) * 2 // 3)] for name in sample],
+        "misspelt": [misspell(name, rng) for name in sample]
+    }
+    for kind, names in queries.items():
+        seconds = []
+        for name in names:
+            start = time.perf_counter()
+            degrees.resolve_names(name, 5)
+            seconds.append(time.perf_counter() - start)
+        results[kind] = summarize(seconds)
+    return results
+
+
+def misspell(name, rng):
+    """
+    Returns `name` with one letter dropped from one of its words.
+    """
+    words = name.split()
+    i = rng.randrange(len(words))
+    if len(words[i]) > 2:
+        j = rng.randrange(len(words[i]))
+        words[i] = words[i][:j] + words[i][j + 1:]
+    return " ".join(words)
+
+
+def reset():
+    """
+    Forgets any data loaded into the degrees module.
+    """
+    degrees.names = {}
+    degrees.people = {}
+    degrees.movies = {}
+    degrees.graph = None
+    degrees.co_star_index = None
+    degrees.name_index = None
+    degrees.cached_co_stars.cache_clear()
+
+
+def measure_load(directory, compact):
+    """
+    Loads the dataset twice and returns (seconds, bytes allocated): the
+    first load is timed, and the second traced, since tracing every
+    allocation slows loading down unevenly.
+    """
+    reset()
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact)
+    elapsed = time.perf_counter() - start
+
+    reset()
+    tracemalloc.start()
+    degrees.load_data(directory, compact=compact)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, allocated
+
+
+def report(results):
+    """
+    Prints the results of a benchmark run.
+    """
+    print(f"Loaded {results['people']} people and {results['movies']} movies "
+          f"in {results['load_seconds']:.2f} s.")
+    names = results["names"]
+    print(f"Name index built in {names['index_seconds']:.2f} s.")
+    for kind in ("exact", "prefix", "misspelt"):
+        print(f"  {kind:>8} names: {names[kind]['mean_ms']:.3f} ms mean, {names[kind]['p95_ms']:.3f} ms p95")
+    for distance, summary in results["paths"].items():
+        if summary["count"]:
+            print(f"  {distance} degrees: {summary['count']:>4} queries, "
+                  f"{summary['mean_ms']:.3f} ms mean, {summary['p95_ms']:.3f} ms p95")
+        else:
+            print(f"  {distance} degrees: no pairs this far apart")
+    if "co_star_cache" in results:
+        cache = results["co_star_cache"]
+        print(f"Co-star cache: {cache['hits']} hits, {cache['misses']} misses")
+
+
+def compare(results, baseline):
+    """
+    Prints how each mean latency changed since a baseline run.
+    """
+    def change(label, now, before):
+        print(f"  {label}: {before:.3f} -> {now:.3f} ({now / before:.2f}x)" if before else f"  {label}: {now:.3f}")
+
+    print("Compared with baseline:")
+    change("load s", results["load_seconds"], baseline["load_seconds"])
+    for kind in ("exact", "prefix", "misspelt"):
+        change(f"{kind} names ms", results["names"][kind]["mean_ms"], baseline["names"][kind]["mean_ms"])
+    for distance, summary in results["paths"].items():
+        before = baseline["paths"].get(distance, {})
+        if summary["count"] and before.get("count"):
+            change(f"{distance} degrees ms", summary["mean_ms"], before["mean_ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(usage=__doc__.split("Usage: ")[1].strip())
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("queries", nargs="?", type=int, default=20,
+                        help="queries per distance, and names per kind of lookup")
+    parser.add_argument("--generate", nargs=2, type=int, metavar=("PEOPLE", "MOVIES"),
+                        help="write a synthetic dataset into the directory first")
+    parser.add_argument("--stars", type=int, default=4, help="stars per generated movie")
+    parser.add_argument("--power-law", action="store_true",
+                        help="give generated stars a power-law number of movies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bidirectional", action="store_true")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--cache", action="store_true")
+    parser.add_argument("--index", action="store_true")
+    parser.add_argument("--memory", action="store_true",
+                        help="compare memory use of the dict and compact loaders")
+    parser.add_argument("--json", metavar="OUTPUT", help="write the results to a JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare with the JSON results of an earlier run")
+    args = parser.parse_args()
+
+    if args.generate:
+        print("Generating data...")
+        generate(args.directory, *args.generate, stars_per_movie=args.stars,
+                 power_law=args.power_law, seed=args.seed)
+
+    if args.memory:
+        loads = {}
+        for compact in (False, True):
+            seconds, allocated = measure_load(args.directory, compact)
+            loads[compact] = allocated
+            label = "compact" if compact else "dicts"
+            print(f"{label:>7}: loaded in {seconds:.2f} s, {allocated / 2 ** 20:.1f} MiB")
+        graph = degrees.graph
+        print(f"Compact saves {1 - loads[True] / loads[False]:.0%}: the sets it replaces would take "
+              f"{degrees.star_set_nbytes(graph) / 2 ** 20:.1f} MiB, against {graph.nbytes() / 2 ** 20:.1f} MiB "
+              f"of arrays. Details and names take the same memory either way.")
+
+    reset()
+    print("Loading data...")
+    start = time.perf_counter()
+    degrees.load_data(args.directory, compact=args.compact, cache=args.cache)
+    if args.index:
+        degrees.index_co_stars()
+    results = {
+        "directory": args.directory,
+        "options": {option: getattr(args, option) for option in ("bidirectional", "compact", "cache", "index")},
+        "people": len(degrees.people),
+        "movies": len(degrees.movies),
+        "load_seconds": time.perf_counter() - start
+    }
+
+    results["names"] = time_names(args.queries, args.seed)
+
+    search = degrees.bidirectional_shortest_path if args.bidirectional else degrees.shortest_path
+    results["paths"] = {}
+    for distance, pairs in bucketed_pairs(args.queries, args.seed).items():
+        results["paths"][str(distance)] = summarize([seconds for seconds, _ in time_queries(pairs, search)])
+
+    info = degrees.cached_co_stars.cache_info()
+    if info.hits or info.misses:
+        results["co_star_cache"] = {"hits": info.hits, "misses": info.misses}
+
+    report(results)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
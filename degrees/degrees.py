@@ -1,8 +1,20 @@
+import argparse
 import csv
+import functools
+import itertools
+import json
+import multiprocessing
+import operator
+import os
 import sys
-import sqlite3
+import time
+from array import array
+from collections import Counter
 
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+from graph import Graph
+from nameindex import NameIndex
+from util import Node, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -13,64 +25,235 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact Graph of who starred in what, used instead of the movies/stars sets when loaded with compact=True
+graph = None
 
-def load_data(directory):
+# NameIndex over the keys of names, built by resolve_names when first needed
+name_index = None
+
+# Number of stars.csv rows read and interned at a time
+CHUNK_ROWS = 65536
+
+# Maximum number of people whose co-stars are kept by cached_co_stars
+CO_STAR_CACHE_SIZE = 4096
+
+# Maps person_ids to their co_stars, when built by index_co_stars (a Graph keeps its own index)
+co_star_index = None
+
+# Graph attached to shared memory in a distance_distributions worker process, with its block
+worker_graph = None
+worker_block = None
+
+
+def load_data(directory, compact=False, cache=False, progress=None):
     """
     Load data from CSV files into memory.
+
+    With `compact`, people and movies only keep their details, and the
+    stars are stored in an integer-indexed Graph instead of sets. Only the
+    stars get smaller: the details and names take the same memory either
+    way, so the total saved is the share the sets would have taken, less
+    the Graph's id indexes. main reports both when loading compactly.
+
+    With `cache`, the data is loaded compactly from a snapshot next to the
+    CSV files, which is written first if it is missing or out of date.
+    People, movies and names are then read-only mappings over the
+    snapshot, which look each entry up as it is needed.
+
+    stars.csv is streamed in chunks, calling progress(rows, seconds)
+    after each one if given.
     """
+    global people, movies, names, graph, co_star_index, name_index
+
+    # Forget anything worked out from previously loaded data
+    graph = None
+    co_star_index = None
+    name_index = None
+    cached_co_stars.cache_clear()
+
+    if cache:
+        compact = True
+        loaded = snapshot.load(directory)
+        if loaded is not None:
+            people, movies, names, graph = loaded
+            return
+    # A snapshot's mappings can't be added to, so start afresh after loading one
+    if not isinstance(people, dict):
+        people, movies, names = {}, {}, {}
+
     # Load people
-    with open("people.csv", encoding="utf-8") as f:
+    with open(os.path.join(directory, "people.csv"), encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            people[row["id"]] = {
+            # Interned so every reference to this id in stars shares one string
+            person_id = sys.intern(row["id"])
+            people[person_id] = {
                 "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
+                "birth": row["birth"]
             }
+            if not compact:
+                people[person_id]["movies"] = set()
             if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+                names[row["name"].lower()] = {person_id}
             else:
-                names[row["name"].lower()].add(row["id"])
+                names[row["name"].lower()].add(person_id)
 
     # Load movies
-    with open("movies.csv", encoding="utf-8") as f:
+    with open(os.path.join(directory, "movies.csv"), encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            movies[row["id"]] = {
+            movie_id = sys.intern(row["id"])
+            movies[movie_id] = {
                 "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+                "year": row["year"]
             }
+            if not compact:
+                movies[movie_id]["stars"] = set()
 
-    # Load stars
-    with open("stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    if compact:
+        graph = load_graph(directory, progress)
+        if cache:
+            snapshot.save(directory, people, movies, names, graph)
+        return
+
+    # Load stars, skipping rows for people or movies that weren't loaded
+    path = os.path.join(directory, "stars.csv")
+    for chunk in stream_csv(path, ("person_id", "movie_id"), progress):
+        for person_id, movie_id in chunk:
+            person = people.get(person_id)
+            movie = movies.get(movie_id)
+            if person is not None and movie is not None:
+                person["movies"].add(sys.intern(movie_id))
+                movie["stars"].add(sys.intern(person_id))
+
+
+def stream_csv(path, columns, progress=None):
+    """
+    Yields lists of up to CHUNK_ROWS rows from a CSV file, each row a tuple
+    of just the given columns, so only one chunk is in memory at a time.
+    Calls progress(rows, seconds) with the running totals after each chunk.
+    """
+    start = time.perf_counter()
+    rows = 0
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        select = operator.itemgetter(*(header.index(column) for column in columns))
+        while True:
+            chunk = [select(row) for row in itertools.islice(reader, CHUNK_ROWS)]
+            if not chunk:
+                break
+            rows += len(chunk)
+            yield chunk
+            if progress is not None:
+                progress(rows, time.perf_counter() - start)
+
+
+def report_progress(rows, seconds):
+    """
+    Prints how many stars.csv rows have been read so far, and how fast.
+    """
+    rate = rows / seconds if seconds else 0
+    print(f"  {rows:,} stars read, {rate:,.0f} rows/s", file=sys.stderr)
+
+
+def load_graph(directory, progress=None):
+    """
+    Streams stars.csv into a Graph over the people and movies already loaded.
+    """
+    result = Graph(list(people), list(movies))
+    person_index = result.person_index
+    movie_index = result.movie_index
+
+    pair_people = array("i")
+    pair_movies = array("i")
+    path = os.path.join(directory, "stars.csv")
+    for chunk in stream_csv(path, ("person_id", "movie_id"), progress):
+        for person_id, movie_id in chunk:
+            person = person_index.get(person_id)
+            movie = movie_index.get(movie_id)
+            if person is not None and movie is not None:
+                pair_people.append(person)
+                pair_movies.append(movie)
+
+    result.set_stars(pair_people, pair_movies)
+    return result
+
+
+def star_set_nbytes(graph):
+    """
+    Returns how many bytes the movies and stars sets of people and movies
+    would take for the stars in a Graph, had it been loaded without compact.
+    """
+    sizes = {}
+
+    def set_size(count):
+        if count not in sizes:
+            sizes[count] = sys.getsizeof(set(range(count)))
+        return sizes[count]
+
+    total = 0
+    for indptr in (graph.person_indptr, graph.movie_indptr):
+        total += sum(map(set_size, map(operator.sub, indptr[1:], indptr[:-1])))
+    return total
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [directory] [--bidirectional] [--compact] [--cache] "
+              "[--index] [--progress] [--serve | --batch PAIRS OUTPUT]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both ends at once")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the stars in integer arrays instead of sets (details and names are kept as dicts)")
+    parser.add_argument("--cache", action="store_true",
+                        help="load from (and keep) a binary snapshot next to the CSV files")
+    parser.add_argument("--index", action="store_true",
+                        help="precompute everyone's co-stars after loading")
+    parser.add_argument("--progress", action="store_true",
+                        help="report rows per second while reading stars.csv")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--serve", action="store_true",
+                      help="answer JSON-lines queries from stdin until it closes")
+    mode.add_argument("--batch", nargs=2, metavar=("PAIRS", "OUTPUT"),
+                      help="answer every source,target row of a CSV file")
+    args = parser.parse_args()
+
+    search = bidirectional_shortest_path if args.bidirectional else shortest_path
 
-    # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    # Load data from files into memory, keeping stdout clean for served answers
+    log = sys.stderr if args.serve else sys.stdout
+    print("Loading data...", file=log)
+    load_data(args.directory, compact=args.compact, cache=args.cache,
+              progress=report_progress if args.progress else None)
+    if args.index:
+        index_co_stars()
+    print("Data loaded.", file=log)
+    if graph is not None:
+        index_bytes = sys.getsizeof(graph.person_index) + sys.getsizeof(graph.movie_index)
+        print(f"Graph uses {graph.nbytes() / 2 ** 20:.1f} MiB of arrays and {index_bytes / 2 ** 20:.1f} MiB "
+              f"of id indexes, in place of {star_set_nbytes(graph) / 2 ** 20:.1f} MiB of movie and star sets. "
+              f"Details and names take the same memory either way.", file=log)
 
-    source = person_id_for_name(input("Name: "))
+    if args.serve:
+        serve(sys.stdin, sys.stdout, search)
+        return
+    if args.batch:
+        count = run_batch(args.batch[0], args.batch[1], search)
+        print(f"Answered {count} queries.")
+        return
+
+    name = input("Name: ")
+    source = person_id_for_name(name)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        person_not_found(name)
+    name = input("Name: ")
+    target = person_id_for_name(name)
     if target is None:
-        sys.exit("Person not found.")
+        person_not_found(name)
 
-    path = shortest_path(source, target)
+    path = search(source, target)
 
     if path is None:
         print("Not connected.")
@@ -85,87 +268,286 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def resolve_person(person):
+    """
+    Returns the person_id for a person_id or an unambiguous name,
+    or None if there is no such person.
+    """
+    if person in people:
+        return person
+    person_ids = names.get(person.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    return None
+
+
+def answer_query(source, target, search):
+    """
+    Answers one query without any prompts, returning a dictionary that
+    holds either the path between the two people or an error.
+    """
+    answer = {"source": source, "target": target}
+    source_id = resolve_person(source)
+    target_id = resolve_person(target)
+    if source_id is None or target_id is None:
+        answer["error"] = "Person not found."
+        # Offer the closest matches so the caller can retry without another lookup
+        answer["candidates"] = {
+            person: resolve_names(person, 5)
+            for person, person_id in ((source, source_id), (target, target_id))
+            if person_id is None
+        }
+        return answer
+
+    path = search(source_id, target_id)
+    if path is None:
+        answer["degrees"] = None
+        answer["path"] = None
+    else:
+        answer["degrees"] = len(path)
+        answer["path"] = [list(step) for step in path]
+    return answer
+
+
+def serve(requests, responses, search):
+    """
+    Reads one JSON query per line, like {"source": ..., "target": ...},
+    and writes one JSON answer per line, keeping the data loaded between them.
+    People can be given by id or by unambiguous name.
+    """
+    for line in requests:
+        if not line.strip():
+            continue
+        try:
+            query = json.loads(line)
+            answer = answer_query(query["source"], query["target"], search)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            answer = {"error": "Expected a JSON object with a source and a target."}
+        responses.write(json.dumps(answer) + "\n")
+        responses.flush()
+
+
+def run_batch(pairs_path, output_path, search):
+    """
+    Answers every row of a CSV file with source and target columns,
+    streaming one output row per query as source, target, degrees, path
+    and error, where the path is written as movie_id:person_id steps
+    separated by semicolons. Unconnected people get an empty path and no
+    error, while a person who isn't found gets the error instead.
+    Returns the number of queries answered.
+    """
     count = 0
-    negative = 0
-    coup = 0
-    person = list(people.values())
-    # Queue Frontier used for Breadth First Search
-    front = QueueFrontier()
-    tempo = 0
-    # Return a set of tuples containing the ids of the people who starred with the source in the id of the movie
-    sauce = neighbors_for_person(source)
-    for x in range(len(person)):
-        # Creates a sorted list version of the data in order to index in
-        why = sorted(sauce)
-        for p in range(len(why)):
-            # Only adds people who aren't the source
-            if why[p] == source:
-                negative = negative + 1
+    with open(pairs_path, encoding="utf-8") as f, open(output_path, "w", encoding="utf-8", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(["source", "target", "degrees", "path", "error"])
+        for row in csv.DictReader(f):
+            answer = answer_query(row["source"], row["target"], search)
+            if answer.get("path") is None:
+                writer.writerow([row["source"], row["target"], "", "", answer.get("error", "")])
             else:
-                # Creates an empty node object
-                temp = Node("unexplored", -1, [0] * 2)
-                # Sets it value the ids of the neighbor and movie
-                temp.action = why[p]
-                # Checks if neighbor is target, then returning the list of the connection to get there
-                if temp.action[1] == target:
-                    front.add(temp)
-                    front.frontier[0].state = "link"
-                    peth = make_path(front, source, target)
-                    return peth
-
-                count = count + 1
-                front.add(temp)
-                # Only adds goes to access the neighbors's once neighbors of source are added
-                # This preserves the Breadth First Search
-                coup = 0
-                for z in range(len(front.frontier)):
-                    if front.frontier[z].state == "unexplored":
-                        coup = coup + 1
-
-                if len(why) == len(front.frontier) - negative or (len(why) <= len(front.frontier) - negative and coup > 0 ):
-                    # Goes through nodes from first added until finds one that hasn't been explored
-                    for y in range(len(front.frontier)):
-                        if front.frontier[y].state == "unexplored":
-                            temps = front.frontier[y].action[1]
-                            tempa = front.frontier[y].action
-                            idiot = neighbors_for_person(temps)
-                            variable = sorted(idiot)
-                            # Checks neighbors of node to see if target
-                            for k in range(len(variable)):
-                
-                                if target in variable[k]:
-                                    nod = Node("link", -1, [0] * 2)
-                                    nod.action = variable[k]
-                                    front.add(nod)
-                                    front.frontier[-1].parent = y
-
-                                    
-                                 
-                                    
-
-                                    pets = make_path(front, source, target)
-                                    return pets
-                            # Else node isn't target so neighbors of node are added to be explored if earlier neighbors aren't target               
-                            front.frontier[y].state = "explored"
-                            for u in range(len(variable)):
-                                tmp = Node("unexplored", -1, [0] * 2)
-                                tmp.action = ***REMOVED***[u]
-                                if tmp.action[1] != target:
-                                    front.add(tmp)
-                                    front.frontier[-1].parent = y
-                                    y = 0
-
-                                # Ensures if target is found, that the node is recognized and creates a path instead of moving to the next node
-                                else:
-                                    nod = Node("link", -1, [0] * 2)
-                                    nod.action = variable[u]
-                                    front.add(nod)
-                                    front.frontier[-1].parent = y
-                                    pets = make_path(front, source, target)
-                                    return pets
-                                    
-                                      
+                path = ";".join(f"{movie_id}:{person_id}" for movie_id, person_id in answer["path"])
+                writer.writerow([row["source"], row["target"], answer["degrees"], path, ""])
+            count += 1
+    return count
+
+
+def shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target.
+
+    If no possible path, returns None.
+    """
+    if graph is not None:
+        path = breadth_first_search(graph.person_index[source], graph.person_index[target], search_neighbors())
+        return graph.to_ids(path)
+    return breadth_first_search(source, target, search_neighbors())
+
+
+def breadth_first_search(source, target, neighbors):
+    """
+    Returns the shortest list of (movie, person) pairs from the source
+    to the target, where `neighbors` gives the (movie, person) pairs
+    next to a person. Works on ids or Graph indexes alike.
+    """
+    if source == target:
+        return []
+
+    # Queue Frontier used for Breadth First Search
+    frontier = QueueFrontier()
+    frontier.add(Node(state=source, parent=None, action=None))
+
+    # People who have already been added to the frontier, so nobody is expanded twice
+    explored = {source}
+
+    while not frontier.empty():
+        node = frontier.remove()
+        for movie_id, person_id in neighbors(node.state):
+            if person_id in explored:
+                continue
+            child = Node(state=person_id, parent=node, action=movie_id)
+            # Checking on insertion rather than removal saves expanding a whole layer
+            if person_id == target:
+                return path_to(child)
+            explored.add(person_id)
+            frontier.add(child)
+
+    return None
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the same kind of path as shortest_path, but searches outward
+    from the source and the target at the same time, always expanding
+    whichever side currently has the smaller frontier.
+
+    If no possible path, returns None.
+    """
+    if graph is not None:
+        path = bidirectional_search(graph.person_index[source], graph.person_index[target], search_neighbors())
+        return graph.to_ids(path)
+    return bidirectional_search(source, target, search_neighbors())
+
+
+def bidirectional_search(source, target, neighbors):
+    """
+    Bidirectional counterpart of breadth_first_search.
+    """
+    if source == target:
+        return []
+
+    # Each side maps the people it has reached to the (movie_id, person_id) it reached them from
+    forward = {source: None}
+    backward = {target: None}
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(forward_layer, forward, forward_depth, backward_depth, neighbors)
+        else:
+            backward_layer, meeting = expand_layer(backward_layer, backward, backward_depth, forward_depth, neighbors)
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    return None
+
+
+def expand_layer(layer, parents, depth, other_depth, neighbors):
+    """
+    Expands every person in one BFS layer, recording how each new person
+    was reached. Returns the next layer and the person where this side met
+    the other side on the shortest combined path, or None if they didn't meet.
+    """
+    next_layer = []
+    meeting = None
+    best = None
+    for person in layer:
+        for movie_id, person_id in neighbors(person):
+            if person_id in parents:
+                continue
+            parents[person_id] = (movie_id, person)
+            depth[person_id] = depth[person] + 1
+            next_layer.append(person_id)
+            # The whole layer is finished before returning, as a later meeting may be shorter
+            if person_id in other_depth:
+                length = depth[person_id] + other_depth[person_id]
+                if best is None or length < best:
+                    best = length
+                    meeting = person_id
+    return next_layer, meeting
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Returns the (movie_id, person_id) pairs from the source to the target
+    through `meeting`, using the parent maps of both searches.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie_id, parent = forward[person]
+        path.append((movie_id, person))
+        person = parent
+    path.reverse()
+
+    person = meeting
+    while backward[person] is not None:
+        movie_id, child = backward[person]
+        path.append((movie_id, child))
+        person = child
+    return path
+
+
+def distances_from(source):
+    """
+    Returns a dictionary mapping every person connected to the source
+    to their number of degrees from the source, such as Bacon numbers
+    when the source is Kevin Bacon.
+    """
+    if graph is not None:
+        distance = graph.distances(graph.person_index[source])
+        return {graph.person_ids[i]: d for i, d in enumerate(distance) if d >= 0}
+
+    distance = {source: 0}
+    layer = [source]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for movie_id, person_id in neighbors_for_person(person):
+                if person_id not in distance:
+                    distance[person_id] = depth
+                    next_layer.append(person_id)
+        layer = next_layer
+    return distance
+
+
+def distance_distributions(sources, processes=None):
+    """
+    Runs a single-source search from each source across a pool of worker
+    processes and returns a dictionary mapping each source to a Counter of
+    how many people are at each number of degrees from it.
+
+    The workers share the compact graph's arrays through shared memory
+    rather than each being sent a copy, so the data must have been loaded
+    with compact=True.
+    """
+    if graph is None:
+        raise ValueError("distance_distributions needs data loaded with compact=True")
+
+    block, spec = graph.share()
+    try:
+        with multiprocessing.Pool(processes, initializer=attach_worker, initargs=(spec,)) as pool:
+            indexes = [graph.person_index[source] for source in sources]
+            histograms = pool.map(distance_histogram, indexes)
+    finally:
+        block.close()
+        block.unlink()
+    return dict(zip(sources, histograms))
+
+
+def attach_worker(spec):
+    """
+    Attaches a pool worker to the graph shared by distance_distributions.
+    """
+    global worker_graph, worker_block
+    worker_graph, worker_block = Graph.attach(spec)
+
+
+def distance_histogram(source):
+    """
+    Counts how many people are at each number of degrees from the
+    person at index `source` of the worker's shared graph.
+    """
+    histogram = Counter(worker_graph.distances(source))
+    del histogram[-1]
+    return histogram
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -192,11 +574,39 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def resolve_names(query, limit=10):
+    """
+    Returns up to `limit` person_ids whose names best match `query`,
+    best first, without any prompts. Partial names match by prefix,
+    and misspelt ones by shared trigrams.
+    """
+    global name_index
+    if name_index is None:
+        name_index = NameIndex(names)
+    person_ids = []
+    for name in name_index.search(query, limit):
+        person_ids.extend(sorted(names[name]))
+    return person_ids[:limit]
+
+
+def person_not_found(name):
+    """
+    Exits, suggesting people with names close to `name`.
+    """
+    if name.lower() not in names:
+        suggestions = [people[person_id]["name"] for person_id in resolve_names(name, 5)]
+        if suggestions:
+            sys.exit(f"Person not found. Did you mean {', '.join(suggestions)}?")
+    sys.exit("Person not found.")
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return set(graph.to_ids(graph.neighbors(graph.person_index[person_id])))
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -204,37 +614,68 @@ def neighbors_for_person(person_id):
             neighbors.add((movie_id, person_id))
     return neighbors
 
-# Function that is called to create a list of tuples that shows the path from source to target
-
-
-def make_path(frontier, source, target):
-    pet = list()
-    can = 0
-    what = list()
-    for loc in range((len(frontier.frontier)) - 1, -1, -1):
-        if can > 0:
-            loc = frontier.frontier[loc].parent
-        if loc == -1:
-            return pet
-        pet.insert(0, frontier.frontier[loc].action)
-        loc = frontier.frontier[loc].parent
-        if loc != -1:
-            pet.insert(0, frontier.frontier[loc].action)
-            frontier.frontier[loc].state = "link"
-            if frontier.frontier[loc].action[1] == source:
-                return pet
-        
-        if loc == -1:
-            return pet
-        if frontier.frontier[loc].action not in pet and frontier.frontier[loc].parent == - 1:
-            pet.insert(0, frontier.frontier[loc].action)
-        loc = frontier.frontier[loc].parent
-        if loc == -1:
-            return pet
-        can +=1
-        pet = list(dict.fromkeys(pet))
-
-    return pet
+def search_neighbors():
+    """
+    Returns the function searches use to expand a person. That is
+    co_stars, except on a compact graph without a co-star index, where
+    slicing the CSR arrays directly is cheaper than building co-star tuples.
+    """
+    if graph is not None and graph.co_star_indptr is None:
+        return graph.neighbors
+    return co_stars
+
+
+def co_stars(person):
+    """
+    Returns (movie, person) pairs with each person who starred with a
+    given person exactly once, along with one movie they shared. Takes a
+    person_id, or a Graph index once the data is loaded compactly.
+    """
+    if co_star_index is not None:
+        return co_star_index[person]
+    if graph is not None and graph.co_star_indptr is not None:
+        return graph.co_stars(person)
+    return cached_co_stars(person)
+
+
+@functools.lru_cache(maxsize=CO_STAR_CACHE_SIZE)
+def cached_co_stars(person):
+    """
+    Looks up co_stars, keeping the most recently used people.
+    Hits and misses are reported by cached_co_stars.cache_info().
+    """
+    if graph is not None:
+        return graph.co_stars(person)
+    shared = {}
+    for movie_id in people[person]["movies"]:
+        for person_id in movies[movie_id]["stars"]:
+            shared[person_id] = movie_id
+    shared.pop(person, None)
+    return tuple(zip(shared.values(), shared))
+
+
+def index_co_stars():
+    """
+    Precomputes co_stars for everyone, so searches never look them up.
+    """
+    global co_star_index
+    if graph is not None:
+        graph.index_co_stars()
+    else:
+        co_star_index = {person_id: cached_co_stars.__wrapped__(person_id) for person_id in people}
+
+
+def path_to(node):
+    """
+    Follows parent pointers from `node` back to the source and returns
+    the (movie_id, person_id) pairs that lead from the source to `node`.
+    """
+    path = []
+    while node.parent is not None:
+        path.append((node.action, node.state))
+        node = node.parent
+    path.reverse()
+    return path
 
 
 if __name__ == "__main__":
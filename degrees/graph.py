@@ -0,0 +1,184 @@
+import itertools
+import operator
+from array import array
+from collections import Counter
+from multiprocessing import shared_memory
+
+
+class Graph():
+    """
+    Compact, integer-indexed form of the star relation.
+
+    People and movies are numbered from 0 in load order. Both directions
+    of the relation are stored in CSR form: the movies of person p are
+    person_movies[person_indptr[p]:person_indptr[p + 1]], and the stars
+    of movie m are movie_stars[movie_indptr[m]:movie_indptr[m + 1]].
+    The arrays can be any int buffer, such as a memoryview of a snapshot.
+    """
+
+    # Names of the adjacency arrays, in the order they are saved
+    ARRAYS = ("person_indptr", "person_movies", "movie_indptr", "movie_stars")
+
+    def __init__(self, person_ids, movie_ids, person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        # Indexes from ids back to positions are built unless given, as a snapshot does
+        if person_index is None:
+            person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.person_indptr = array("i", [0]) * (len(person_ids) + 1)
+        self.person_movies = array("i")
+        self.movie_indptr = array("i", [0]) * (len(movie_ids) + 1)
+        self.movie_stars = array("i")
+        # Optional co-star index in CSR form, filled in by index_co_stars
+        self.co_star_indptr = None
+        self.co_star_people = None
+        self.co_star_movies = None
+
+    def set_stars(self, pair_people, pair_movies):
+        """
+        Fills in the adjacency from parallel arrays of (person, movie)
+        indexes, one entry per row of stars.csv. Duplicate rows are dropped.
+        """
+        self.person_indptr, self.person_movies = csr(pair_people, pair_movies, len(self.person_ids))
+        self.movie_indptr, self.movie_stars = csr(pair_movies, pair_people, len(self.movie_ids))
+
+    def movies_of(self, person):
+        return self.person_movies[self.person_indptr[person]:self.person_indptr[person + 1]]
+
+    def stars_of(self, movie):
+        return self.movie_stars[self.movie_indptr[movie]:self.movie_indptr[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                yield movie, star
+
+    def co_stars(self, person):
+        """
+        Returns (movie, person) index pairs with each person who starred
+        with a given person exactly once, along with one movie they shared.
+        """
+        if self.co_star_indptr is not None:
+            start, end = self.co_star_indptr[person], self.co_star_indptr[person + 1]
+            return tuple(zip(self.co_star_movies[start:end], self.co_star_people[start:end]))
+        shared = {}
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                shared[star] = movie
+        shared.pop(person, None)
+        return tuple(zip(shared.values(), shared))
+
+    def index_co_stars(self):
+        """
+        Precomputes co_stars for every person into three more arrays.
+        """
+        indptr = array("i", [0])
+        co_star_people = array("i")
+        co_star_movies = array("i")
+        for person in range(len(self.person_indptr) - 1):
+            for movie, star in self.co_stars(person):
+                co_star_movies.append(movie)
+                co_star_people.append(star)
+            indptr.append(len(co_star_people))
+        self.co_star_indptr = indptr
+        self.co_star_people = co_star_people
+        self.co_star_movies = co_star_movies
+
+    def distances(self, source):
+        """
+        Returns an array holding every person's number of degrees from
+        person `source`, or -1 for people who aren't connected.
+        """
+        n_people = len(self.person_indptr) - 1
+        distance = array("i", [-1]) * n_people
+        distance[source] = 0
+        # A movie only needs expanding once, from the first person to reach it
+        expanded = bytearray(len(self.movie_indptr) - 1)
+        layer = [source]
+        depth = 0
+        while layer:
+            depth += 1
+            next_layer = []
+            for person in layer:
+                for movie in self.movies_of(person):
+                    if expanded[movie]:
+                        continue
+                    expanded[movie] = 1
+                    for star in self.stars_of(movie):
+                        if distance[star] < 0:
+                            distance[star] = depth
+                            next_layer.append(star)
+            layer = next_layer
+        return distance
+
+    def share(self):
+        """
+        Copies the adjacency arrays into one block of shared memory.
+        Returns the block, which the caller must close and unlink, and a
+        small picklable spec that other processes can pass to attach.
+        """
+        arrays = [getattr(self, name) for name in self.ARRAYS]
+        itemsize = arrays[0].itemsize
+        block = shared_memory.SharedMemory(create=True, size=max(1, sum(len(a) for a in arrays) * itemsize))
+        offset = 0
+        for a in arrays:
+            size = len(a) * itemsize
+            block.buf[offset:offset + size] = memoryview(a).cast("B")
+            offset += size
+        return block, (block.name, itemsize, [len(a) for a in arrays])
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        Returns (graph, block) for a spec made by share. The graph reads its
+        adjacency straight from the shared block and has no ids, so it can
+        only work with indexes. The block must stay open while it is in use.
+        """
+        name, itemsize, lengths = spec
+        block = shared_memory.SharedMemory(name=name)
+        graph = cls([], [])
+        offset = 0
+        for array_name, length in zip(cls.ARRAYS, lengths):
+            size = length * itemsize
+            setattr(graph, array_name, block.buf[offset:offset + size].cast("i"))
+            offset += size
+        return graph, block
+
+    def to_ids(self, path):
+        """
+        Converts a path of (movie, person) indexes back into IMDB ids.
+        """
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+    def nbytes(self):
+        """
+        Returns the number of bytes held by the adjacency arrays.
+        """
+        return sum(a.itemsize * len(a) for a in (getattr(self, name) for name in self.ARRAYS))
+
+
+def csr(rows, cols, n_rows):
+    """
+    Groups parallel arrays of (row, col) pairs by row and returns
+    (indptr, indices), with each row's columns sorted and deduplicated.
+    """
+    # Each pair becomes one int that orders by row and then column, so one
+    # sort of the distinct pairs groups and orders them all inside map and sorted
+    width = max(cols, default=-1) + 1
+    keys = sorted(set(map(operator.add, map(width.__mul__, rows), cols)))
+    indices = array("i", map(width.__rmod__, keys))
+
+    counts = Counter(map(width.__rfloordiv__, keys))
+    indptr = array("i", [0])
+    indptr.extend(itertools.accumulate(map(counts.__getitem__, range(n_rows))))
+    return indptr, indices
@@ -0,0 +1,145 @@
+import bisect
+import heapq
+import itertools
+import math
+import operator
+from array import array
+from collections import Counter
+
+# Words scoring below this trigram similarity to a query word aren't considered matches
+WORD_SIMILARITY = 0.3
+
+# Most vocabulary words kept as matches for each query word
+WORD_MATCHES = 10
+
+# Most vocabulary words scored for each query word, taking those sharing the most trigrams
+WORD_CANDIDATES = 100
+
+
+class NameIndex():
+    """
+    Index over lowercase names for prefix and fuzzy lookups.
+
+    Names are kept sorted so every name starting with a prefix sits in one
+    contiguous run, found with bisect. For fuzzy matching, the distinct
+    words of all names form a vocabulary: each word maps to an array of the
+    positions of the names using it, and each trigram to an array of the
+    vocabulary words containing it. Misspelt query words are matched to
+    the vocabulary first, which keeps the posting lists short.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.words = {}
+        # Number of words in each name, so names can be scored without splitting them
+        self.lengths = array("i")
+        for position, name in enumerate(self.names):
+            self.lengths.append(len(name.split()))
+            for word in set(name.split()):
+                if word not in self.words:
+                    self.words[word] = array("i")
+                self.words[word].append(position)
+
+        self.vocabulary = list(self.words)
+        self.sizes = array("i")
+        self.trigrams = {}
+        for position, word in enumerate(self.vocabulary):
+            found = trigrams(word)
+            self.sizes.append(len(found))
+            for trigram in found:
+                if trigram not in self.trigrams:
+                    self.trigrams[trigram] = array("i")
+                self.trigrams[trigram].append(position)
+
+    def prefixed(self, prefix, limit):
+        """
+        Returns up to `limit` names starting with `prefix`, shortest first.
+        """
+        start = bisect.bisect_left(self.names, prefix)
+        end = bisect.bisect_left(self.names, prefix + "\uffff", lo=start)
+        return heapq.nsmallest(limit, self.names[start:end], key=len)
+
+    def similar_words(self, word):
+        """
+        Returns a dictionary mapping the vocabulary words most like `word`
+        to their Jaccard similarity over trigrams.
+
+        A word needs a share of WORD_SIMILARITY of the query's trigrams to
+        match, so it must contain one of the rarest ones: only those
+        posting lists are counted, skipping the most common trigrams. The
+        WORD_CANDIDATES words sharing the most of them are then checked for
+        the skipped trigrams and scored.
+        """
+        if word in self.words:
+            return {word: 1.0}
+        postings = self.trigrams
+        wanted = sorted(trigrams(word), key=lambda trigram: len(postings.get(trigram, ())))
+        needed = math.ceil(WORD_SIMILARITY * len(wanted))
+        rare = wanted[:len(wanted) - needed + 1]
+        common = wanted[len(wanted) - needed + 1:]
+        shared = Counter()
+        for trigram in rare:
+            if trigram in postings:
+                shared.update(postings[trigram])
+
+        sizes = self.sizes
+        candidates = sorted(shared.items(), key=operator.itemgetter(1), reverse=True)[:WORD_CANDIDATES]
+        scored = []
+        for position, overlap in candidates:
+            padded = f"  {self.vocabulary[position]} "
+            overlap += sum(trigram in padded for trigram in common)
+            score = overlap / (len(wanted) + sizes[position] - overlap)
+            if score >= WORD_SIMILARITY:
+                scored.append((score, position))
+        return {self.vocabulary[position]: score for score, position in heapq.nlargest(WORD_MATCHES, scored)}
+
+    def similar(self, query, limit):
+        """
+        Returns up to `limit` (name, score) pairs for the names most like
+        `query`, best first. Each query word is scored against the closest
+        word in the name, and names with extra words score a little lower.
+        """
+        words = query.split()
+        matches = [self.similar_words(word) for word in words]
+        matched = [match for match in matches if match]
+        if not matched:
+            return []
+
+        # Each name's best match score for each query word, gathered in
+        # ascending order of score so that the best one is written last
+        bests = []
+        for match in matched:
+            best = {}
+            for word, score in sorted(match.items(), key=operator.itemgetter(1)):
+                best.update(zip(self.words[word], itertools.repeat(score)))
+            bests.append(best)
+
+        # Only names using a match for the most selective query word are
+        # candidates. They are scored inside map and sorted rather than one
+        # at a time; names are sorted, so positions break ties as names would
+        candidates = min(bests, key=len)
+        totals = map(sum, zip(*[map(best.get, candidates, itertools.repeat(0)) for best in bests]))
+        spans = map(max, itertools.repeat(len(words)), map(self.lengths.__getitem__, candidates))
+        scored = sorted(zip(map(operator.truediv, totals, spans), candidates), reverse=True)[:limit]
+        return [(self.names[position], score) for score, position in scored]
+
+    def search(self, query, limit):
+        """
+        Returns up to `limit` names best matching `query`: an exact match
+        first, then names starting with it, then similarly spelt names
+        if nothing starts with it.
+        """
+        query = " ".join(query.lower().split())
+        found = self.prefixed(query, limit)
+        if not found:
+            found = [name for name, _ in self.similar(query, limit)]
+        return found
+
+
+def trigrams(word):
+    """
+    Returns the set of three-letter runs in a word, padded so that
+    its start and end count too.
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,282 @@
+"""
+Binary snapshot of a loaded dataset, saved next to its CSV files.
+
+The file holds a fingerprint of the CSVs and then a run of raw arrays:
+the Graph's adjacency, and the people, movies and names stored as string
+tables (UTF-8 text back to back, with an array of offsets into it). Ids
+and names are also kept sorted, so they can be looked up by bisection.
+Everything is memory-mapped on load rather than read, so opening a
+snapshot only parses its header, and each record is decoded when it is
+looked up.
+"""
+
+import bisect
+import contextlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Mapping, Sequence
+
+from graph import Graph
+
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP2"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Details kept for each person and movie, in the order they are saved
+PERSON_FIELDS = ("name", "birth")
+MOVIE_FIELDS = ("title", "year")
+
+# Arrays are aligned so they can be cast in place
+ALIGN = 8
+
+
+class Strings(Sequence):
+    """
+    Sequence of strings stored as UTF-8 text back to back, where string i
+    is data[offsets[i]:offsets[i + 1]]. Strings are decoded when indexed.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def find(self, key):
+        """
+        Returns the position of `key` in these strings, which must be
+        sorted, or -1 if it isn't there.
+        """
+        i = bisect.bisect_left(self, key)
+        if i < len(self) and self[i] == key:
+            return i
+        return -1
+
+
+class Index(Mapping):
+    """
+    Maps ids to Graph indexes, like Graph.person_index, using the ids in
+    sorted order and the index of each.
+    """
+
+    def __init__(self, ids, positions):
+        self.ids = ids
+        self.positions = positions
+
+    def __getitem__(self, key):
+        i = self.ids.find(key) if isinstance(key, str) else -1
+        if i < 0:
+            raise KeyError(key)
+        return self.positions[i]
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class Records(Mapping):
+    """
+    Maps ids to dictionaries of details, like the people and movies
+    dictionaries, with each field stored as Strings in Graph order.
+    """
+
+    def __init__(self, ids, index, fields):
+        self.ids = ids
+        self.index = index
+        self.fields = fields
+
+    def __getitem__(self, key):
+        i = self.index[key]
+        return {field: column[i] for field, column in self.fields.items()}
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class Groups(Mapping):
+    """
+    Maps lowercase names to sets of person_ids, like the names dictionary,
+    using the names in sorted order and the Graph indexes of each name's people.
+    """
+
+    def __init__(self, names, indptr, members, person_ids):
+        self.names = names
+        self.indptr = indptr
+        self.members = members
+        self.person_ids = person_ids
+
+    def __getitem__(self, key):
+        i = self.names.find(key) if isinstance(key, str) else -1
+        if i < 0:
+            raise KeyError(key)
+        return {self.person_ids[person] for person in self.members[self.indptr[i]:self.indptr[i + 1]]}
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def fingerprint(directory):
+    """
+    Returns the size and modification time of each CSV file, so any
+    change to them invalidates the snapshot.
+    """
+    result = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        result[filename] = [stat.st_size, stat.st_mtime_ns]
+    return result
+
+
+def save(directory, people, movies, names, graph):
+    """
+    Writes a snapshot of the loaded data into `directory`.
+    """
+    sections = {}
+    for kind, records, ids, index, fields in (
+            ("person", people, graph.person_ids, graph.person_index, PERSON_FIELDS),
+            ("movie", movies, graph.movie_ids, graph.movie_index, MOVIE_FIELDS)):
+        add_strings(sections, f"{kind}_ids", ids)
+        keys = sorted(ids)
+        add_strings(sections, f"{kind}_keys", keys)
+        sections[f"{kind}_order"] = array("i", (index[key] for key in keys))
+        for field in fields:
+            add_strings(sections, f"{kind}_{field}", (records[key][field] for key in ids))
+
+    keys = sorted(names)
+    add_strings(sections, "name_keys", keys)
+    members = array("i")
+    indptr = array("q", [0])
+    for key in keys:
+        members.extend(sorted(graph.person_index[person_id] for person_id in names[key]))
+        indptr.append(len(members))
+    sections["name_indptr"] = indptr
+    sections["name_members"] = members
+
+    for name in Graph.ARRAYS:
+        sections[name] = getattr(graph, name)
+
+    header = json.dumps({
+        "fingerprint": fingerprint(directory),
+        "sections": {name: [section.typecode, len(section)] for name, section in sections.items()}
+    }).encode()
+
+    with atomic_write(os.path.join(directory, FILENAME)) as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for section in sections.values():
+            f.write(b"\0" * (-f.tell() % ALIGN))
+            f.write(section)
+
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """
+    Yields a binary file to write in place of `path`. It is written under
+    a temporary name and only replaces `path` once complete, so a snapshot
+    is never read half-written.
+    """
+    with open(path + ".tmp", "wb") as f:
+        yield f
+    os.replace(path + ".tmp", path)
+
+
+def add_strings(sections, name, values):
+    """
+    Adds the offsets and text of a string table to `sections`.
+    """
+    data = bytearray()
+    offsets = array("q", [0])
+    for value in values:
+        data += value.encode("utf-8")
+        offsets.append(len(data))
+    sections[name + "_offsets"] = offsets
+    sections[name + "_data"] = array("B", data)
+
+
+def load(directory):
+    """
+    Returns (people, movies, names, graph) from the snapshot in `directory`,
+    or None if there is no readable snapshot or the CSV files have changed
+    since. People, movies and names are read-only mappings over the file.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        sections = read_sections(data, directory)
+        if sections is None:
+            return None
+        return from_sections(sections)
+    except (struct.error, ValueError, KeyError, TypeError):
+        # A truncated or corrupt snapshot is rebuilt like a missing one
+        return None
+
+
+def from_sections(sections):
+    """
+    Returns (people, movies, names, graph) over the arrays of a snapshot.
+    """
+    def strings(name):
+        return Strings(sections[name + "_offsets"], sections[name + "_data"])
+
+    person_ids = strings("person_ids")
+    movie_ids = strings("movie_ids")
+    person_index = Index(strings("person_keys"), sections["person_order"])
+    movie_index = Index(strings("movie_keys"), sections["movie_order"])
+    graph = Graph(person_ids, movie_ids, person_index, movie_index)
+    for name in Graph.ARRAYS:
+        setattr(graph, name, sections[name])
+
+    people = Records(person_ids, person_index, {field: strings(f"person_{field}") for field in PERSON_FIELDS})
+    movies = Records(movie_ids, movie_index, {field: strings(f"movie_{field}") for field in MOVIE_FIELDS})
+    names = Groups(strings("name_keys"), sections["name_indptr"], sections["name_members"], person_ids)
+    return people, movies, names, graph
+
+
+def read_sections(data, directory):
+    """
+    Returns a dictionary of the arrays in a mapped snapshot, each cast from
+    the file in place, or None if it isn't a snapshot of `directory`'s CSVs.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+    offset = len(MAGIC)
+    (length,) = struct.unpack_from("<Q", data, offset)
+    offset += 8
+    header = json.loads(data[offset:offset + length])
+    offset += length
+    if header["fingerprint"] != fingerprint(directory):
+        return None
+
+    view = memoryview(data)
+    sections = {}
+    for name, (typecode, length) in header["sections"].items():
+        offset += -offset % ALIGN
+        end = offset + length * array(typecode).itemsize
+        if end > len(data):
+            raise ValueError(f"snapshot ends inside {name}")
+        sections[name] = view[offset:end].cast(typecode)
+        offset = end
+    return sections
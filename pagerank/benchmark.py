@@ -0,0 +1,173 @@
+"""
+Benchmarks sampling and iterating PageRank on the bundled corpora and on
+synthetic graphs, recording throughput, each solver's residual trace, and
+how far the sampled ranks are from the iterated ones.
+
+Usage: python benchmark.py [--pages N] [--links N] [--dangling FRACTION]
+       [--samples N] [--seed N] [--solvers SOLVER ...] [--json OUTPUT]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from array import array
+
+import pagerank
+from linkgraph import LinkGraph
+
+# Bundled corpora, run as smoke tests before the synthetic graphs
+CORPORA = ("corpus0", "corpus1", "corpus2")
+
+
+def erdos_renyi(n_pages, links, seed=0):
+    """
+    Returns a G(n, m) random LinkGraph of `n_pages` pages with about
+    `links` links per page, each between two pages picked uniformly.
+    """
+    rng = random.Random(seed)
+    found = set()
+    for _ in range(n_pages * links):
+        source, target = rng.randrange(n_pages), rng.randrange(n_pages)
+        if source != target:
+            found.add((source, target))
+    found = sorted(found)
+    sources = array("i", (source for source, _ in found))
+    targets = array("i", (target for _, target in found))
+    return graph_from(n_pages, sources, targets)
+
+
+def power_law(n_pages, links, seed=0):
+    """
+    Returns a LinkGraph of `n_pages` pages where each page links to
+    `links` pages on average, with targets picked with Zipf-like weights
+    so a few pages receive most of the links.
+    """
+    rng = random.Random(seed)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(n_pages)))
+    order = list(range(n_pages))
+    rng.shuffle(order)
+    sources = array("i")
+    targets = array("i")
+    for source in range(n_pages):
+        count = min(n_pages - 1, rng.randint(0, 2 * links))
+        found = {order[k] for k in rng.choices(range(n_pages), cum_weights=weights, k=count)}
+        found.discard(source)
+        sources.extend(array("i", [source]) * len(found))
+        targets.extend(sorted(found))
+    return graph_from(n_pages, sources, targets)
+
+
+def dangling_heavy(n_pages, links, fraction, seed=0):
+    """
+    Returns a LinkGraph like erdos_renyi, except that a `fraction` of the
+    pages have no links at all.
+    """
+    rng = random.Random(seed)
+    graph = erdos_renyi(n_pages, links, seed)
+    silent = set(rng.sample(range(n_pages), int(fraction * n_pages)))
+    sources, targets = graph.edges()
+    kept = [k for k, source in enumerate(sources) if source not in silent]
+    return graph_from(n_pages, array("i", (sources[k] for k in kept)), array("i", (targets[k] for k in kept)))
+
+
+def graph_from(n_pages, sources, targets):
+    """
+    Returns a LinkGraph over pages named after their index.
+    """
+    pages = [f"{page}.html" for page in range(n_pages)]
+    return LinkGraph.from_edges(pages, sources, targets)
+
+
+def measure(graph, samples, seed=0, solvers=("power",)):
+    """
+    Iterates PageRank on a LinkGraph with each of `solvers` and samples it,
+    and returns the timings, each solver's residual trace, and the L1
+    distance between the sampled ranks and the first solver's. Each
+    solver's time is also given as a ratio to power iteration's, which is
+    timed for that even if it isn't one of `solvers`.
+    """
+    results = {
+        "pages": len(graph.pages),
+        "links": len(graph.out_links),
+        "dangling": len(graph.dangling),
+        "solvers": {}
+    }
+    for name in dict.fromkeys([*solvers, "power"]):
+        trace = []
+        start = time.perf_counter()
+        solved, iterations = pagerank.SOLVERS[name](graph, pagerank.DAMPING, trace=trace)
+        seconds = time.perf_counter() - start
+        if name == solvers[0]:
+            ranks = solved
+        results["solvers"][name] = {
+            "iterations": iterations,
+            "seconds": seconds,
+            "iterations_per_second": iterations / seconds,
+            "residuals": trace
+        }
+    for timing in results["solvers"].values():
+        timing["power_time_ratio"] = timing["seconds"] / results["solvers"]["power"]["seconds"]
+
+    start = time.perf_counter()
+    visits = pagerank.sample_visits(graph, pagerank.DAMPING, samples, seed)
+    sample_seconds = time.perf_counter() - start
+    results.update({
+        "samples": samples,
+        "sample_seconds": sample_seconds,
+        "samples_per_second": samples / sample_seconds,
+        "l1_distance": sum(abs(count / samples - rank) for count, rank in zip(visits, ranks))
+    })
+    return results
+
+
+def report(name, result):
+    """
+    Prints the results of benchmarking one graph.
+    """
+    print(f"{name}: {result['pages']} pages, {result['links']} links, {result['dangling']} dangling")
+    for solver, timing in result["solvers"].items():
+        print(f"  {solver}: {timing['iterations']} iterations in {timing['seconds']:.3f} s "
+              f"({timing['power_time_ratio']:.2f}x power), final residual {timing['residuals'][-1]:.2e}")
+    print(f"  sampling: {result['samples_per_second']:,.0f} samples per second, "
+          f"L1 distance from iteration {result['l1_distance']:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(usage=__doc__.split("Usage: ")[1].strip())
+    parser.add_argument("--pages", type=int, default=10000, help="pages in each synthetic graph")
+    parser.add_argument("--links", type=int, default=8, help="mean links per synthetic page")
+    parser.add_argument("--dangling", type=float, default=0.5,
+                        help="fraction of pages without links in the dangling-heavy graph")
+    parser.add_argument("--samples", type=int, default=pagerank.SAMPLES * 100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--solvers", nargs="+", choices=pagerank.SOLVERS, default=list(pagerank.SOLVERS),
+                        help="solvers to compare, the first being the baseline sampling is measured against")
+    parser.add_argument("--json", metavar="OUTPUT", help="write the results to a JSON file")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    graphs = {
+        corpus: LinkGraph.from_corpus(pagerank.crawl(os.path.join(here, corpus)))
+        for corpus in CORPORA
+    }
+    print("Generating graphs...")
+    graphs["erdos_renyi"] = erdos_renyi(args.pages, args.links, args.seed)
+    graphs["power_law"] = power_law(args.pages, args.links, args.seed)
+    graphs["dangling_heavy"] = dangling_heavy(args.pages, args.links, args.dangling, args.seed)
+
+    options = {"samples": args.samples, "seed": args.seed, "damping": pagerank.DAMPING, "solvers": args.solvers}
+    results = {"options": options, "graphs": {}}
+    for name, graph in graphs.items():
+        results["graphs"][name] = measure(graph, args.samples, args.seed, args.solvers)
+        report(name, results["graphs"][name])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Parallel crawler that turns a directory of HTML pages into a compact
+edge list on disk.
+
+Files are scanned by a thread pool, and each is memory-mapped rather than
+read, so a large page is never held in memory whole. Page names are
+interned to their index in sorted order, and links are written as two
+int32 arrays of source and target indexes, which LinkGraph.from_edges
+reads directly.
+
+The links found in each file can also be cached in the corpus directory,
+along with each file's size and modification time, so that later crawls
+only scan the files that have been added or changed since.
+
+Usage: python crawler.py corpus output [--threads N] [--cache]
+"""
+
+import argparse
+import contextlib
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+MAGIC = b"PRLINKS1"
+
+CACHE = "pagerank.cache"
+CACHE_VERSION = 2
+
+# Sections are aligned so the arrays can be cast in place
+ALIGN = 8
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+
+def scan(path):
+    """
+    Returns the set of link targets in the HTML file at `path`.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return set()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return {link.decode("utf-8", "replace") for link in LINK.findall(data)}
+
+
+def crawl_edges(directory, threads=None, cache=False):
+    """
+    Scans every .html file in `directory` and returns (pages, sources,
+    targets): the sorted page names, and parallel arrays of the indexes
+    of each link's source and target. Links to the page itself or to
+    pages outside the corpus are left out. With `cache`, only files that
+    changed since the last cached crawl are scanned.
+    """
+    if cache:
+        links, _ = cached_links(directory, threads)
+    else:
+        pages = html_files(directory)
+        with ThreadPoolExecutor(threads) as pool:
+            links = dict(zip(pages, pool.map(scan, (os.path.join(directory, page) for page in pages))))
+    return edges(links)
+
+
+def html_files(directory):
+    """
+    Returns the sorted names of the .html files in `directory`.
+    """
+    return sorted(filename for filename in os.listdir(directory) if filename.endswith(".html"))
+
+
+def edges(links):
+    """
+    Returns (pages, sources, targets) for a dictionary mapping each page
+    to the set of links found in it.
+    """
+    pages = sorted(links)
+    index = {page: i for i, page in enumerate(pages)}
+    sources = array("i")
+    targets = array("i")
+    for source, page in enumerate(pages):
+        found = sorted(index[link] for link in links[page] if link in index)
+        found = [target for target in found if target != source]
+        sources.extend(array("i", [source]) * len(found))
+        targets.extend(found)
+    return pages, sources, targets
+
+
+def cached_links(directory, threads=None):
+    """
+    Returns a dictionary mapping each page in `directory` to the set of
+    links found in it, and the number of files that had to be scanned.
+
+    Links are reused from the cache for files whose size and modification
+    time haven't changed. The cache is patched with any added, changed or
+    removed files and written back. The cache is JSON, mapping each file
+    to its [size, mtime_ns, links], so reading it runs no code. A missing
+    or unreadable cache, such as one cut short, counts as empty.
+    """
+    path = os.path.join(directory, CACHE)
+    cached = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored["version"] == CACHE_VERSION and stored["directory"] == os.path.abspath(directory):
+            cached = stored["files"]
+        if not isinstance(cached, dict):
+            cached = {}
+    except (OSError, ValueError, KeyError, TypeError):
+        cached = {}
+
+    files = {}
+    stale = []
+    for page in html_files(directory):
+        stat = os.stat(os.path.join(directory, page))
+        entry = cached.get(page)
+        if (isinstance(entry, list) and entry[:2] == [stat.st_size, stat.st_mtime_ns]
+                and len(entry) == 3 and isinstance(entry[2], list)
+                and all(isinstance(link, str) for link in entry[2])):
+            files[page] = entry
+        else:
+            files[page] = [stat.st_size, stat.st_mtime_ns, None]
+            stale.append(page)
+
+    if stale:
+        with ThreadPoolExecutor(threads) as pool:
+            for page, links in zip(stale, pool.map(scan, (os.path.join(directory, page) for page in stale))):
+                files[page][2] = sorted(links)
+    if stale or len(files) != len(cached):
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "directory": os.path.abspath(directory), "files": files}, f)
+
+    return {page: set(links) for page, (_, _, links) in files.items()}, len(stale)
+
+
+def save(path, pages, sources, targets):
+    """
+    Writes an edge list to `path`: a header, the page names, then the
+    source and target arrays.
+    """
+    header = json.dumps({"pages": len(pages), "edges": len(sources)}).encode()
+    names = "\n".join(pages).encode()
+
+    with atomic_write(path, "wb") as f:
+        f.write(MAGIC)
+        for section in (header, names):
+            f.write(struct.pack("<Q", len(section)))
+            f.write(section)
+        for edges in (sources, targets):
+            f.write(b"\0" * (-f.tell() % ALIGN))
+            f.write(edges)
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode, **options):
+    """
+    Opens a temporary file next to `path` with `mode` and `options`, and
+    renames it over `path` when the block ends, so readers only ever see
+    a finished file.
+    """
+    with open(path + ".tmp", mode, **options) as f:
+        yield f
+    os.replace(path + ".tmp", path)
+
+
+def load(path):
+    """
+    Returns (pages, sources, targets) from an edge list written by save.
+    The arrays are memoryviews of the memory-mapped file.
+    """
+    data, header, offset = open_edges(path)
+    names, offset = read_section(data, offset)
+    pages = names.decode().split("\n") if header["pages"] else []
+    return (pages,) + edge_arrays(data, header, offset)
+
+
+def load_arrays(path):
+    """
+    Returns (pages, sources, targets) like load, but with just the number
+    of pages instead of their names, for when the names won't fit in memory.
+    """
+    data, header, offset = open_edges(path)
+    (length,) = struct.unpack_from("<Q", data, offset)
+    return (header["pages"],) + edge_arrays(data, header, offset + 8 + length)
+
+
+def open_edges(path):
+    """
+    Memory-maps an edge list, and returns the mapping, its header, and
+    the offset just after the header.
+    """
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an edge list")
+    # The arrays are read from start to end, so the kernel can read ahead
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        data.madvise(mmap.MADV_SEQUENTIAL)
+    header, offset = read_section(data, len(MAGIC))
+    return data, json.loads(header), offset
+
+
+def edge_arrays(data, header, offset):
+    """
+    Returns memoryviews of the source and target arrays following `offset`.
+    """
+    view = memoryview(data)
+    arrays = []
+    for _ in range(2):
+        offset += -offset % ALIGN
+        end = offset + header["edges"] * 4
+        arrays.append(view[offset:end].cast("i"))
+        offset = end
+    return tuple(arrays)
+
+
+def read_section(data, offset):
+    """
+    Returns the length-prefixed section starting at `offset`, and the offset after it.
+    """
+    (length,) = struct.unpack_from("<Q", data, offset)
+    offset += 8
+    return data[offset:offset + length], offset + length
+
+
+def main():
+    parser = argparse.ArgumentParser(usage=__doc__.split("Usage: ")[1].strip())
+    parser.add_argument("corpus")
+    parser.add_argument("output")
+    parser.add_argument("--threads", type=int, help="files scanned at once")
+    parser.add_argument("--cache", action="store_true", help="only scan files changed since the last cached crawl")
+    args = parser.parse_args()
+
+    pages, sources, targets = crawl_edges(args.corpus, args.threads, args.cache)
+    save(args.output, pages, sources, targets)
+    print(f"Wrote {len(pages)} pages and {len(sources)} links to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
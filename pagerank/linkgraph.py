@@ -0,0 +1,134 @@
+import itertools
+from array import array
+
+import numpy as np
+from scipy import sparse
+
+
+class LinkGraph():
+    """
+    Integer-indexed form of a corpus.
+
+    Pages are numbered in sorted order of their names. Links are stored
+    in CSR form both ways: the pages linking to page i are
+    in_links[in_indptr[i]:in_indptr[i + 1]], and the pages it links to are
+    out_links[out_indptr[i]:out_indptr[i + 1]]. Pages with no outgoing
+    links are listed in `dangling`, and treated as linking to every page.
+    """
+
+    def __init__(self, pages, in_indptr, in_links, out_indptr, out_links):
+        self.pages = pages
+        self.index = {page: i for i, page in enumerate(pages)}
+        self.in_indptr = in_indptr
+        self.in_links = in_links
+        self.out_indptr = out_indptr
+        self.out_links = out_links
+        self.transitions = None
+        self.out_degree = np.diff(np.asarray(out_indptr, dtype=np.int64)).astype(np.int32)
+        self.dangling = np.flatnonzero(self.out_degree == 0).astype(np.int32)
+        # Share of a page's rank passed along each of its links
+        self.out_weight = np.divide(1.0, self.out_degree, out=np.zeros(len(pages)), where=self.out_degree > 0)
+
+    @classmethod
+    def from_edges(cls, pages, sources, targets):
+        """
+        Builds a graph from parallel arrays of (source, target) page indexes.
+        """
+        in_indptr, in_links = csr(targets, sources, len(pages))
+        out_indptr, out_links = csr(sources, targets, len(pages))
+        return cls(pages, in_indptr, in_links, out_indptr, out_links)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds a graph from a corpus as returned by crawl.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        sources = array("i")
+        targets = array("i")
+        for page in pages:
+            for link in corpus[page]:
+                if link in index and link != page:
+                    sources.append(index[page])
+                    targets.append(index[link])
+        return cls.from_edges(pages, sources, targets)
+
+    def matrix(self):
+        """
+        Returns the transition matrix as a SciPy CSR matrix, built on first
+        use: entry (i, j) is the share of page j's rank passed to page i,
+        so row i holds page i's in-links.
+        """
+        if self.transitions is None:
+            n = len(self.pages)
+            in_links = np.asarray(self.in_links, dtype=np.int32)
+            self.transitions = sparse.csr_matrix(
+                (self.out_weight[in_links], in_links, np.asarray(self.in_indptr)), shape=(n, n))
+        return self.transitions
+
+    def edges(self):
+        """
+        Returns parallel arrays of the (source, target) indexes of every link.
+        """
+        sources = np.repeat(np.arange(len(self.pages), dtype=np.int32), self.out_degree)
+        return sources, np.asarray(self.out_links, dtype=np.int32)
+
+    def with_edges(self, added=(), removed=()):
+        """
+        Returns a new graph over the same pages with links added and removed,
+        each given as a (source, target) pair of page names. Self-links and
+        links already present are ignored.
+        """
+        added, removed = list(added), list(removed)
+        for source, target in itertools.chain(added, removed):
+            for page in (source, target):
+                if page not in self.index:
+                    raise ValueError(f"{page} is not in the graph")
+        n = len(self.pages)
+        sources, targets = self.edges()
+        # Number each link source * n + target, so links compare as single integers
+        links = sources.astype(np.int64) * n + targets
+        links = links[~contains(np.unique(self.link_numbers(removed)), links)]
+        added = np.unique(self.link_numbers((source, target) for source, target in added if source != target))
+        added = np.setdiff1d(added, links[contains(added, links)], assume_unique=True)
+        # from_edges sorts stably by source, so the added links follow each page's kept ones
+        links = np.concatenate([links, added])
+        return self.from_edges(self.pages, links // n, links % n)
+
+    def link_numbers(self, links):
+        """
+        Returns an array numbering each (source, target) pair of page names
+        as source * n + target, where n is the number of pages.
+        """
+        numbers = [self.index[source] * len(self.pages) + self.index[target] for source, target in links]
+        return np.array(numbers, dtype=np.int64)
+
+    def to_dict(self, ranks):
+        """
+        Returns a dictionary mapping each page name to its value in `ranks`.
+        """
+        return dict(zip(self.pages, ranks))
+
+
+def csr(rows, cols, n_rows):
+    """
+    Groups parallel arrays of (row, col) pairs by row and returns (indptr, indices).
+    """
+    rows = np.asarray(rows, dtype=np.int32)
+    indptr = np.zeros(n_rows + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    # A stable sort keeps each row's columns in their original order
+    indices = np.asarray(cols, dtype=np.int32)[np.argsort(rows, kind="stable")]
+    return indptr, indices
+
+
+def contains(keys, values):
+    """
+    Returns a mask of which of `values` are in the sorted array `keys`.
+    Each value is looked up by bisection, so `keys` can be much shorter.
+    """
+    if len(keys) == 0:
+        return np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(keys, values), len(keys) - 1)
+    return keys[positions] == values
@@ -1,33 +1,89 @@
+import argparse
+import math
+import multiprocessing
 import os
 import random
 import re
-import sys
-import random
+
+import numpy as np
+
+import crawler
+from linkgraph import LinkGraph
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Random numbers are drawn this many at a time while sampling
+BATCH = 1 << 20
+
+# Random surfers stepped together when sampling, and the steps
+# each takes before its visits count, so the surfers forget where they started
+WALKERS = 16384
+BURN_IN = 64
+
+# Most samples one walker takes when sampling in parallel
+WALK = 100000
+
+# Links read at a time when streaming an edge list from disk
+CHUNK = 1 << 20
+
+# Iteration stops once the ranks change by less than this in total (L1 norm)
+TOLERANCE = 1e-10
+MAX_ITERATIONS = 1000
+
+# Gauss-Seidel sweeps update pages in this many blocks, and the adaptive
+# solver freezes a page once it has been calm for FREEZE_AFTER sweeps in a
+# row and updates every page again each REFRESH-th sweep
+BLOCKS = 32
+FREEZE_AFTER = 3
+REFRESH = 8
+
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    parser = argparse.ArgumentParser(usage="python pagerank.py corpus [--cache] [--edges] [--solver SOLVER]")
+    parser.add_argument("corpus")
+    parser.add_argument("--solver", choices=SOLVERS, default="power", help="how to iterate PageRank")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse the links of files unchanged since the last cached crawl")
+    parser.add_argument("--edges", action="store_true",
+                        help="treat corpus as an edge list written by crawler.py, and iterate out of core")
+    args = parser.parse_args()
+    if args.edges:
+        values, iterations = streaming_power_iteration(args.corpus, DAMPING)
+        pages, _, _ = crawler.load(args.corpus)
+        print(f"PageRank Results from Streaming Iteration ({iterations} iterations)")
+        for page, rank in sorted(zip(pages, values)):
+            print(f"  {page}: {rank:.4f}")
+        return
+    corpus = crawl(args.corpus, cache=args.cache)
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
-    print(f"PageRank Results from Iteration")
+    graph = LinkGraph.from_corpus(corpus)
+    values, iterations = SOLVERS[args.solver](graph, DAMPING)
+    ranks = graph.to_dict(values)
+    print(f"PageRank Results from Iteration ({iterations} iterations)")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, cache=False):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    With `cache`, links are read from the crawler's cache in the directory,
+    and only files changed since the last cached crawl are parsed.
     """
+    if cache:
+        links, _ = crawler.cached_links(directory)
+        return {
+            page: set(link for link in links[page] if link in links and link != page)
+            for page in links
+        }
+
     pages = dict()
 
     # Extract all links from HTML files
@@ -76,7 +132,7 @@ def transition_model(corpus, page, damping_factor):
 
     return distro
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, processes=None, seed=None, tolerance=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -84,112 +140,549 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    If `processes` is given, the samples are split across that many worker
+    processes as in parallel_sample, which may stop early once every
+    page's standard error is below `tolerance`.
     """
-    counter = 0
-    # Creates new samples until the required amount is achieved
-    for x in range(SAMPLES):
-        # If first sample, everything is initialized and the page is selected randomly
-        if counter == 0:
-            temp = list(corpus.keys())
-            new_page = random.choice(temp)
-            PageRank = dict()
-            for i in corpus.keys():
-                PageRank[i] = 0
-                for y in corpus[i]:
-                    PageRank[y] = 0
+    graph = LinkGraph.from_corpus(corpus)
+    if processes is None:
+        visits = sample_visits(graph, damping_factor, n, seed)
+        return graph.to_dict(count / n for count in visits)
+    tally = parallel_sample(graph, damping_factor, n, processes, seed, tolerance)
+    return graph.to_dict(tally.ranks())
 
-        else:
-            for j in PageRank.keys():
-                # If the page is in the PageRank, it recorded that one more sample led to that page
-                if new_page == j:
-                    PageRank[j] += 1
-                    break
-        # Finds probability of choosing each page
-        probability = transition_model(corpus,new_page,damping_factor)
-        idk = list(probability.keys())
-        # Chooses a page based on these probabilities
-        who = random.choices(idk, probability.values())
-        # Converts list into string for functionality purposes
-        string = ''
-        new_page = string.join(who)
-        page = new_page
-        counter += 1
-    # Once all samples have been taken, the number of samples for each page is divided by the total number of samples
-    # This calculates the proportion of samples that involved said page, thus calculating it's PageRank
-    for p in PageRank.keys():
-        PageRank[p] = PageRank[p] / SAMPLES
 
-    return PageRank
+def alias_tables(graph, damping_factor):
+    """
+    Builds a Walker alias table for the transition model of every page.
+
+    A page with L links has L + 1 outcomes: each link, with probability
+    damping_factor / L, and jumping to a page chosen uniformly at random,
+    with probability 1 - damping_factor (or 1 if it has no links). The
+    table for page i fills slots out_indptr[i] + i to out_indptr[i + 1] + i
+    of the returned (probability, primary, alternative) arrays: a slot picks
+    its primary page with its probability and its alternative otherwise,
+    where -1 stands for a random jump.
+
+    Every outcome but the jump is equally likely, so the tables follow in
+    closed form from each page's scaled link weight s = damping_factor *
+    (L + 1) / L, and are built with whole-array operations. If s < 1, each
+    link's slot keeps its link with probability s and jumps otherwise, and
+    the jump fills its own slot. Otherwise the jump's slot is topped up by
+    the first link, and each link's slot by the next, with the excess
+    e = s - 1 of each link passed down the chain: link k keeps its slot
+    with probability 1 - (L - 1 - k) * e, so the last link fills its own.
+    """
+    n = len(graph.pages)
+    out_indptr = np.asarray(graph.out_indptr, dtype=np.int64)
+    out_links = np.asarray(graph.out_links, dtype=np.int32)
+    degree = graph.out_degree.astype(np.int64)
+    size = len(out_links) + n
+    probability = np.ones(size)
+    primary = np.full(size, -1, dtype=np.int32)
+    alternative = np.full(size, -1, dtype=np.int32)
+
+    linking = degree > 0
+    scaled = np.divide(damping_factor * (degree + 1), degree, out=np.zeros(n), where=linking)
+    chained = linking & (scaled >= 1)
+
+    # Each link's page, its position among that page's links, and its slot
+    page = np.repeat(np.arange(n), degree)
+    position = np.arange(len(out_links)) - out_indptr[page]
+    slots = np.arange(len(out_links)) + page
+    primary[slots] = out_links
+
+    # Pages whose links are under-full leave the rest of each link's slot to the jump
+    short = ~chained[page]
+    probability[slots[short]] = scaled[page[short]]
+
+    # Pages whose jump is under-full pass each link's excess down the chain of slots
+    long = ~short
+    excess = scaled[page[long]] - 1
+    probability[slots[long]] = 1 - (degree[page[long]] - 1 - position[long]) * excess
+    # The next slot's primary, which for the last link is the unused jump
+    alternative[slots[long]] = primary[slots[long] + 1]
+    jumps = out_indptr[1:][chained] + np.flatnonzero(chained)
+    probability[jumps] = (1 - damping_factor) * (degree[chained] + 1)
+    alternative[jumps] = out_links[out_indptr[:-1][chained]]
+    return probability, primary, alternative
+
+
+def sample_visits(graph, damping_factor, n, seed=None):
+    """
+    Takes `n` samples of the random surfer over a LinkGraph, starting at
+    random pages, and returns an array counting the visits to each page.
+    `seed` is an int or a tuple of ints, or None for a fresh stream.
+    """
+    return walk(sampler(graph, damping_factor), n, seed)
+
+
+def sampler(graph, damping_factor):
+    """
+    Returns the tables walk needs to sample from a LinkGraph:
+    the alias tables, where each page's table starts, and its size.
+    """
+    starts = np.asarray(graph.out_indptr[:-1]) + np.arange(len(graph.pages))
+    outcomes = graph.out_degree + 1
+    return alias_tables(graph, damping_factor) + (starts, outcomes)
+
+
+def walk(tables, n, seed=None):
+    """
+    Takes `n` samples of the random surfer using tables made by sampler,
+    and returns an array counting the visits to each page.
+
+    Up to WALKERS independent surfers are stepped in lockstep, every step
+    a handful of whole-array operations, with their random numbers drawn
+    from a NumPy Generator BATCH at a time. Each surfer starts at a random
+    page and takes BURN_IN steps before its visits count, so there are
+    only as many surfers as keep those steps under a quarter of the total.
+    """
+    probability, primary, alternative, starts, outcomes = tables
+    rng = np.random.default_rng(seed)
+    pages = len(starts)
+    walkers = max(1, min(WALKERS, n // (4 * BURN_IN)))
+    visits = np.zeros(pages, dtype=np.int64)
+    current = rng.integers(pages, size=walkers)
+
+    steps = BURN_IN + -(-n // walkers)
+    block = max(1, BATCH // walkers)
+    counted = 0
+    for first in range(0, steps, block):
+        size = min(block, steps - first)
+        draws = rng.random((size, 2, walkers))
+        seen = []
+        for step in range(size):
+            if first + step >= BURN_IN:
+                take = min(walkers, n - counted)
+                seen.append(current[:take])
+                counted += take
+            # One draw picks a slot of each page's alias table and settles it, the other picks where to jump
+            scaled = draws[step, 0] * outcomes[current]
+            k = scaled.astype(np.int64)
+            slot = starts[current] + k
+            current = np.where(scaled - k < probability[slot], primary[slot], alternative[slot])
+            jumps = current < 0
+            current[jumps] = (draws[step, 1, jumps] * pages).astype(np.int64)
+        if seen:
+            visits += np.bincount(np.concatenate(seen), minlength=pages)
+    return visits
+
+
+class VisitTally():
+    """
+    Merged visit counts from independent walkers.
+
+    Alongside the total visits to each page, the tally keeps the sums
+    needed for the spread of each walker's estimate around the merged one,
+    so tallies can be merged in any order and still give the standard error.
+    """
+
+    def __init__(self, pages):
+        self.walks = 0
+        self.samples = 0
+        self.samples_squared = 0
+        self.visits = np.zeros(pages, dtype=np.int64)
+        self.visits_squared = np.zeros(pages, dtype=np.int64)
+        self.cross = np.zeros(pages, dtype=np.int64)
+
+    def add(self, visits):
+        """
+        Adds the visit counts of one more walker.
+        """
+        samples = int(sum(visits))
+        self.walks += 1
+        self.samples += samples
+        self.samples_squared += samples * samples
+        visits = np.asarray(visits, dtype=np.int64)
+        self.visits += visits
+        self.visits_squared += visits * visits
+        self.cross += visits * samples
+
+    def merge(self, other):
+        """
+        Adds all the walkers of another tally.
+        """
+        self.walks += other.walks
+        self.samples += other.samples
+        self.samples_squared += other.samples_squared
+        self.visits += other.visits
+        self.visits_squared += other.visits_squared
+        self.cross += other.cross
+
+    def ranks(self):
+        """
+        Returns an array of each page's share of all visits.
+        """
+        return self.visits / self.samples
+
+    def errors(self):
+        """
+        Returns an array of the standard error of each page's rank,
+        estimated from how much the walkers disagree, or infinities if
+        there are fewer than two walkers.
+        """
+        if self.walks < 2:
+            return np.full(len(self.visits), math.inf)
+        mean = self.samples / self.walks
+        scale = 1 / (mean * math.sqrt(self.walks * (self.walks - 1)))
+        ranks = self.visits / self.samples
+        # Sum over walkers of (visits - rank * samples) squared
+        spread = self.visits_squared - 2 * ranks * self.cross + ranks * ranks * self.samples_squared
+        return np.sqrt(np.maximum(spread, 0)) * scale
+
+
+def parallel_sample(graph, damping_factor, n, processes=None, seed=None, tolerance=None):
+    """
+    Splits `n` samples into walks of at most WALK samples and runs them
+    across a pool of processes, which share sampling tables built once here.
+
+    How many walks there are, and how many samples each takes, depends
+    only on `n`. Each walk starts from a random page and draws from its own
+    stream, seeded from `seed` and the walk's number, and the walks are
+    tallied in order, so a seeded run gives the same result with any number
+    of processes. If `tolerance` is given, sampling stops early, after the
+    first walk at which every page's standard error is below it.
+
+    Returns the VisitTally of the walks taken.
+    """
+    processes = processes or os.cpu_count()
+    walks = max(1, math.ceil(n / WALK))
+    if seed is None:
+        seed = random.randrange(2 ** 64)
+    tasks = [((seed, i), n // walks + (i < n % walks)) for i in range(walks)]
+
+    tally = VisitTally(len(graph.pages))
+    tables = sampler(graph, damping_factor)
+    with multiprocessing.Pool(processes, initializer=attach_sampler, initargs=(tables,)) as pool:
+        for done, visits in enumerate(pool.imap(sample_walk, tasks), 1):
+            tally.add(visits)
+            if tolerance is not None and done < walks and max(tally.errors()) < tolerance:
+                break
+    return tally
+
 
+# Sampling tables of a pool worker, handed over once by attach_sampler
+worker_tables = None
 
 
+def attach_sampler(tables):
+    """
+    Keeps the sampling tables built by the parent in a pool worker.
+    """
+    global worker_tables
+    worker_tables = tables
+
 
+def sample_walk(task):
+    """
+    Takes one walk in a pool worker from a (seed, samples) pair and
+    returns its visit counts.
+    """
+    seed, samples = task
+    return walk(worker_tables, samples, seed)
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, solver="power"):
     """
     Return PageRank values for each page by iteratively updating
-    PageRank values until convergence.
+    PageRank values until convergence, using one of SOLVERS.
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    somenum = 0
-    NewPageRank = dict()
-    PageRank = dict()
-    foo = list()
-    total = 0
-    # Initiliazing variables
-    for i in corpus.keys():
-        PageRank[i] = 0
-        NewPageRank[i] = 0
-        # If the page has no outbound links, page is interpreted to have links to all other pages and itself
-        if len(corpus[i]) == 0:
-            for b in corpus.keys():
-                corpus[i].add(b)
-        for y in corpus[i]:
-            PageRank[y] = 0
-            NewPageRank[y] = 0
-    # Every PageRank is set to the same thing so each page initially has the same chance of being chosen
-    for x in PageRank:
-        foo = list()
-        PageRank[x] = 1 / len(PageRank)
-        # Adds all pages that have outbound links to that page
-        for n in PageRank:
-            if x in corpus[n]:
-                foo.append(n)
-
-        NewPageRank[x] = foo
-    # Loop repeat until values converge
-    # Couldn't get it to repeat succesfully until values changed by less than 0.001 so i just repeated it until the sum of the values where near enough to 0
-    while total != 0.9999999999999996:
-        if total == 1.0000000000000007:
-            return PageRank
-        total = 0
-
-        idk = list(PageRank.keys())
-        # Random page is chosen based on probabilites
-        Page = random.choices(idk,PageRank.values())
-        # Finds that page's key
-        for w in corpus.keys():
-            if w == Page[0]:
-                somenum = 0
-                # Goes through each inbound link to that page
-                for p in NewPageRank[w]:
-                    Num = 0
-                    # Adds each page's PageRank divided by it's number of outbound links
-                    somenum = somenum + (PageRank[p] / (len(corpus[p])))
-
-                # PageRank iterative formula
-                PageRank[w] = ((1 - damping_factor) / len(idk)) + (damping_factor * somenum)
-                kid = list(PageRank.values())
-                # Total PageRank of all pages is calculated
-                for s in range(len(kid)):
-                    total = total + kid[s]
-    return PageRank
+    graph = LinkGraph.from_corpus(corpus)
+    ranks, _ = SOLVERS[solver](graph, damping_factor)
+    return graph.to_dict(ranks)
 
 
+def update_pagerank(graph, ranks, added=(), removed=(), damping_factor=DAMPING,
+                    tolerance=TOLERANCE, compare=False):
+    """
+    Updates PageRank after some links change, warm-starting iteration from
+    the previous ranks rather than from equal ones. `added` and `removed`
+    are iterables of (source, target) pairs of page names.
+
+    Return (graph, ranks, iterations, saved): the changed LinkGraph, its
+    ranks, the iterations taken, and, with `compare`, how many fewer that
+    is than starting cold (or None otherwise).
+    """
+    graph = graph.with_edges(added, removed)
+    ranks, iterations = power_iteration(graph, damping_factor, tolerance, start=ranks)
+    saved = None
+    if compare:
+        _, cold = power_iteration(graph, damping_factor, tolerance)
+        saved = cold - iterations
+    return graph, ranks, iterations, saved
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, start=None,
+                    trace=None):
+    """
+    Runs power iteration over a LinkGraph, starting from the ranks in
+    `start` or else equal ranks, until the ranks change by less than
+    `tolerance` in total. If `trace` is a list, the change made by each
+    iteration is appended to it.
+
+    Return (ranks, iterations), where ranks is an array indexed like
+    graph.pages.
+    """
+    ranks = starting_ranks(len(graph.pages), start)
+    for iteration in range(1, max_iterations + 1):
+        new_ranks = pagerank_step(graph, ranks, damping_factor)
+        change = l1_distance(new_ranks, ranks)
+        ranks = new_ranks
+        if trace is not None:
+            trace.append(change)
+        if change < tolerance:
+            return ranks, iteration
+    return ranks, max_iterations
+
+
+def starting_ranks(n, start=None):
+    """
+    Returns equal ranks for `n` pages, or the ranks in `start` scaled to
+    sum to 1, as a NumPy array.
+    """
+    ranks = np.full(n, 1 / n) if start is None else np.array(start, dtype=float)
+    # Renormalise, since previous ranks may only have converged roughly
+    return ranks / ranks.sum()
+
+
+def l1_distance(a, b):
+    """
+    Returns the L1 distance between two rank vectors.
+    """
+    return float(np.abs(np.subtract(a, b)).sum())
+
+
+def pagerank_step(graph, ranks, damping_factor):
+    """
+    Returns the ranks after one application of the PageRank formula, as
+    one sparse matrix-vector product.
+    """
+    n = len(graph.pages)
+    damping_factor = float(damping_factor)
+    # Pages without links share their rank with every page, including themselves
+    dangling = ranks[graph.dangling].sum()
+    return (1 - damping_factor) / n + damping_factor * (dangling / n + graph.matrix() @ ranks)
+
+
+def gauss_seidel(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, start=None, trace=None):
+    """
+    Solves PageRank with block Gauss-Seidel sweeps: each sweep updates the
+    pages in place, BLOCKS blocks at a time, so every block's update
+    already sees the new ranks of the blocks before it. This converges in
+    fewer sweeps than power iteration needs steps, and a sweep costs about
+    as much as a step.
+
+    Takes the same arguments and returns the same (ranks, iterations) as
+    power_iteration, counting sweeps as iterations.
+    """
+    ranks = starting_ranks(len(graph.pages), start)
+    state = sweep(graph, damping_factor, ranks, None)
+    for iteration in range(1, max_iterations + 1):
+        change = sweep(graph, damping_factor, ranks, state)
+        if trace is not None:
+            trace.append(change)
+        if change < tolerance:
+            return ranks, iteration
+    return ranks, max_iterations
+
+
+def adaptive_iteration(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS, start=None,
+                       trace=None):
+    """
+    Runs the block Gauss-Seidel sweeps of gauss_seidel, except that pages
+    stop being recomputed once they converge.
+
+    A page is frozen once its rank has changed by less than tolerance / n
+    for FREEZE_AFTER steps in a row, and later sweeps leave its rank be,
+    skipping any block whose pages are all frozen. Every
+    REFRESH-th sweep updates every page, unfreezing any that moved again,
+    and iteration only stops after such a full sweep.
+
+    Takes the same arguments and returns the same (ranks, iterations) as
+    power_iteration.
+    """
+    n = len(graph.pages)
+    ranks = starting_ranks(n, start)
+    threshold = tolerance / n
+    state = sweep(graph, damping_factor, ranks, None)
+    full = True
+    for iteration in range(1, max_iterations + 1):
+        full = full or iteration % REFRESH == 0
+        change = sweep(graph, damping_factor, ranks, state, threshold, full)
+        if trace is not None:
+            trace.append(change)
+        if change < tolerance:
+            if full:
+                break
+            # The pages still active have settled, so check every page before stopping
+            full = True
+        else:
+            full = False
+    else:
+        iteration = max_iterations
+    return ranks, iteration
+
+
+def sweep(graph, damping_factor, ranks, state, threshold=None, full=True):
+    """
+    Runs one sweep of gauss_seidel, updating `ranks` in place, and returns
+    the change it made. Called with no state, returns the state later
+    sweeps need: each block's first page and rows of the transition
+    matrix, and how many steps each page has been calm for, by `threshold`
+    if given.
+
+    Unless `full`, pages frozen by adaptive_iteration keep their ranks,
+    and blocks with no other pages are skipped.
+    """
+    n = len(graph.pages)
+    damping_factor = float(damping_factor)
+    if state is None:
+        matrix = graph.matrix()
+        size = -(-n // BLOCKS)
+        blocks = [(first, matrix[first:first + size]) for first in range(0, n, size)]
+        is_dangling = np.zeros(n, dtype=bool)
+        is_dangling[graph.dangling] = True
+        return blocks, is_dangling, np.zeros(n, dtype=np.int64)
+
+    blocks, is_dangling, calm = state
+    previous = ranks.copy()
+    total = ranks.sum()
+    dangling = ranks[is_dangling].sum()
+    for first, rows in blocks:
+        # Whole blocks are updated through slices, which are much cheaper than picking pages out
+        pages = slice(first, first + rows.shape[0])
+        if not full:
+            frozen = calm[pages] >= FREEZE_AFTER
+            if frozen.all():
+                continue
+        # Random jumps spread the total rank, which sweeps don't keep at 1
+        new_ranks = ((1 - damping_factor) * total + damping_factor * dangling) / n + damping_factor * (rows @ ranks)
+        if not full:
+            new_ranks[frozen] = ranks[pages][frozen]
+        differences = new_ranks - ranks[pages]
+        ranks[pages] = new_ranks
+        total += differences.sum()
+        dangling += differences[is_dangling[pages]].sum()
+    ranks /= ranks.sum()
+
+    differences = np.abs(ranks - previous)
+    if threshold is not None:
+        calm[:] = np.where(differences < threshold, calm + 1, 0)
+    return float(differences.sum())
+
+
+def streaming_power_iteration(path, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Runs power iteration over an edge list written by crawler.save without
+    loading it: every step streams the memory-mapped links from disk in
+    order, CHUNK at a time. Only arrays with one entry per page are held
+    in memory.
+
+    Return (ranks, iterations), where ranks is an array indexed like the
+    edge list's pages.
+    """
+    n, sources, targets = crawler.load_arrays(path)
+    sources = np.frombuffer(sources, dtype=np.int32)
+    targets = np.frombuffer(targets, dtype=np.int32)
+    damping_factor = float(damping_factor)
+
+    # One pass to count each page's links
+    degree = np.zeros(n, dtype=np.int64)
+    for start in range(0, len(sources), CHUNK):
+        degree += np.bincount(sources[start:start + CHUNK], minlength=n)
+    weight = np.divide(1.0, degree, out=np.zeros(n), where=degree > 0)
+    dangling = np.flatnonzero(degree == 0)
+    del degree
+
+    ranks = np.full(n, 1 / n)
+    for iteration in range(1, max_iterations + 1):
+        # Pages without links share their rank with every page, including themselves
+        spread = ranks[dangling].sum()
+        shares = damping_factor * ranks * weight
+        new_ranks = np.full(n, (1 - damping_factor) / n + damping_factor * spread / n)
+        for start in range(0, len(sources), CHUNK):
+            chunk = slice(start, start + CHUNK)
+            new_ranks += np.bincount(targets[chunk], weights=shares[sources[chunk]], minlength=n)
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tolerance:
+            return ranks, iteration
+    return ranks, max_iterations
+
+
+def personalized_pagerank(corpus, seeds, damping_factor=DAMPING):
+    """
+    Return topic-sensitive PageRank values for each set of pages in
+    `seeds`, where random jumps land only on that set's pages.
+
+    Return a list of dictionaries, one per seed set, where keys are page
+    names and values are PageRank values that sum to 1. Raises ValueError
+    if a seed set has no page in the corpus.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    teleports = []
+    for seed_set in seeds:
+        pages = set(seed_set).intersection(graph.index)
+        if not pages:
+            raise ValueError(f"seed set {sorted(seed_set)} has no page in the corpus")
+        teleports.append([1 / len(pages) if page in pages else 0.0 for page in graph.pages])
+    ranks, _ = batched_power_iteration(graph, teleports, damping_factor)
+    return [graph.to_dict(vector) for vector in ranks]
+
+
+def batched_power_iteration(graph, teleports, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Runs power iteration for many teleport vectors at once. `teleports` is a
+    matrix with one row per vector, each a distribution over graph.pages
+    that random jumps follow instead of the uniform one. Pages without
+    links pass their rank along the teleport vector too, as NetworkX does,
+    so a vector's ranks stay on the pages reachable from it. Raises ValueError
+    if a row has the wrong length or doesn't have a positive sum.
+
+    The rank vectors are the columns of one n-by-k array, and each
+    iteration follows pagerank_step with one sparse matrix-matrix product.
+    Iteration stops once every vector changes by less than `tolerance`.
+    Return (ranks, iterations), where ranks is a list of arrays indexed
+    like graph.pages, one per teleport vector.
+    """
+    n = len(graph.pages)
+    count = len(teleports)
+    if count == 0:
+        return [], 0
+    for k, row in enumerate(teleports):
+        if len(row) != n:
+            raise ValueError(f"teleport vector {k} has {len(row)} entries, not {n}")
+        if not sum(row) > 0:
+            raise ValueError(f"teleport vector {k} doesn't have a positive sum")
+    damping_factor = float(damping_factor)
+    teleport = np.array(teleports, dtype=float).T
+    teleport /= teleport.sum(axis=0)
+    matrix = graph.matrix()
+
+    ranks = np.full(teleport.shape, 1 / n)
+    for iteration in range(1, max_iterations + 1):
+        # Pages without links jump like the surfer does, along the teleport vector
+        dangling = ranks[graph.dangling].sum(axis=0)
+        new_ranks = (1 - damping_factor + damping_factor * dangling) * teleport + damping_factor * (matrix @ ranks)
+        change = np.abs(new_ranks - ranks).sum(axis=0).max()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+    return list(ranks.T), iteration
+
+
+# Iterative solvers, by the name main and the benchmark know them by
+SOLVERS = {
+    "power": power_iteration,
+    "gauss-seidel": gauss_seidel,
+    "adaptive": adaptive_iteration
+}
 
 
 if __name__ == "__main__":
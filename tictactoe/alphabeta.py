@@ -0,0 +1,93 @@
+"""
+Alpha-beta minimax for tictactoe with move ordering.
+
+Positions are bitboards (x, o), as in bitboard.py. Moves that win are
+tried first, then moves that block the opponent's win, then the centre,
+the corners and the edges. Good moves early narrow the alpha-beta window
+soonest, so more of the tree is cut off.
+"""
+
+import bitboard
+from bitboard import COUNTS, FULL, WINS, X
+
+# Centre, then corners, then edges
+ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+
+def ordered_moves(me, opponent):
+    """
+    Returns the empty cells in the order they should be searched, for the
+    player to move, whose marks are `me`.
+    """
+    free = ~(me | opponent) & FULL
+    winning = []
+    blocking = []
+    for mask in WINS:
+        empty = mask & free
+        if COUNTS[empty] == 1:
+            if COUNTS[me & mask] == 2:
+                winning.append(empty.bit_length() - 1)
+            elif COUNTS[opponent & mask] == 2:
+                blocking.append(empty.bit_length() - 1)
+    rest = [cell for cell in ORDER if free >> cell & 1]
+    return list(dict.fromkeys(winning + blocking + rest))
+
+
+def moves_for(x, o):
+    """
+    Returns the empty cells of (x, o) in search order for the player to move.
+    """
+    return ordered_moves(x, o) if bitboard.player(x, o) == X else ordered_moves(o, x)
+
+
+def search(x, o, alpha, beta, counter):
+    """
+    Returns the minimax value of (x, o) from X's point of view, exact if
+    it lies between `alpha` and `beta`, and a bound on it otherwise.
+    Counts every position visited in counter[0].
+    """
+    counter[0] += 1
+    won = bitboard.winner(x, o)
+    if won is not None:
+        return 1 if won == X else -1
+    if (x | o) == FULL:
+        return 0
+
+    if bitboard.player(x, o) == X:
+        value = -2
+        for cell in ordered_moves(x, o):
+            value = max(value, search(x | 1 << cell, o, alpha, beta, counter))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    else:
+        value = 2
+        for cell in ordered_moves(o, x):
+            value = min(value, search(x, o | 1 << cell, alpha, beta, counter))
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+    return value
+
+
+def best_move(x, o):
+    """
+    Returns (cell, nodes): an optimal move on the board (x, o), or None if
+    the game is over, and the number of positions the search visited.
+    """
+    counter = [0]
+    if bitboard.terminal(x, o):
+        return None, counter[0]
+
+    turn = bitboard.player(x, o)
+    best = None
+    alpha, beta = -2, 2
+    for cell in moves_for(x, o):
+        value = search(*bitboard.play(x, o, cell), alpha, beta, counter)
+        if turn == X and value > alpha:
+            best, alpha = cell, value
+        elif turn != X and value < beta:
+            best, beta = cell, value
+        if alpha >= 1 or beta <= -1:
+            break
+    return best, counter[0]
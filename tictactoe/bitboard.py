@@ -0,0 +1,133 @@
+"""
+Bitboard form of a tictactoe board.
+
+A board is a pair of 9-bit ints (x, o), with bit 3 * i + j set where that
+player has marked row i, column j. A win is a mask comparison against each
+of the 8 lines, and player, actions and result are a few bit operations.
+The searches work on (x, o) throughout, with cells numbered 3 * i + j, and
+the adapters convert to and from the list-of-lists boards runner.py uses.
+The adapters and winner also take boards of other sizes, as used by mnk.py.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals, as masks of their cells
+WINS = (0b000000111, 0b000111000, 0b111000000,
+        0b001001001, 0b010010010, 0b100100100,
+        0b100010001, 0b001010100)
+
+# Number of marks in each 9-bit board
+COUNTS = bytes(bin(bits).count("1") for bits in range(1 << 9))
+
+# Base-3 number of each 9-bit board, with a digit 1 for each mark
+THREES = tuple(sum(3 ** cell for cell in range(9) if bits >> cell & 1) for bits in range(1 << 9))
+
+
+def from_board(board):
+    """
+    Converts a list-of-lists board into (x, o), numbering the cell in row
+    i, column j as i times the row length plus j.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (len(row) * i + j)
+            elif cell == O:
+                o |= 1 << (len(row) * i + j)
+    return x, o
+
+
+def to_board(x, o, rows=3, columns=3):
+    """
+    Converts (x, o) into a list-of-lists board of `rows` by `columns`.
+    """
+    return [[X if x >> (columns * i + j) & 1 else O if o >> (columns * i + j) & 1 else EMPTY
+             for j in range(columns)] for i in range(rows)]
+
+
+def index(x, o):
+    """
+    Returns the base-3 number of a board: the sum over cells of 0, 1 or 2
+    (empty, X or O) times 3 ** cell.
+    """
+    return THREES[x] + 2 * THREES[o]
+
+
+def player(x, o):
+    """
+    Returns the player to move, X moving first.
+    """
+    return X if COUNTS[x] == COUNTS[o] else O
+
+
+def actions(x, o):
+    """
+    Returns the empty cells as (i, j) tuples.
+    """
+    free = ~(x | o) & FULL
+    return [divmod(cell, 3) for cell in range(9) if free >> cell & 1]
+
+
+def moves(x, o):
+    """
+    Returns the empty cells as cell numbers.
+    """
+    free = ~(x | o) & FULL
+    return [cell for cell in range(9) if free >> cell & 1]
+
+
+def play(x, o, cell):
+    """
+    Returns (x, o) after the player to move marks `cell`, which must be empty.
+    """
+    if COUNTS[x] == COUNTS[o]:
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def result(x, o, action):
+    """
+    Returns (x, o) after the player to move marks `action`, an (i, j) tuple.
+    """
+    bit = 1 << (3 * action[0] + action[1])
+    if (x | o) & bit:
+        raise ValueError(f"{action} is already taken")
+    if COUNTS[x] == COUNTS[o]:
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o, lines=WINS):
+    """
+    Returns the player who has filled one of `lines`, if any.
+    """
+    for mask in lines:
+        if x & mask == mask:
+            return X
+        if o & mask == mask:
+            return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if the game is over.
+    """
+    return (x | o) == FULL or winner(x, o) is not None
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won, -1 if O has, and 0 otherwise.
+    """
+    won = winner(x, o)
+    if won == X:
+        return 1
+    if won == O:
+        return -1
+    return 0
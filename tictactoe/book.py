@@ -0,0 +1,99 @@
+"""
+Perfect-play opening book for tictactoe.
+
+The book has one byte for every board, at the board's base-3 index: the
+sum over cells of 0, 1 or 2 (empty, X or O) times 3 ** cell, for 3 ** 9
+entries in all. For each position reachable in a game that isn't over,
+the low four bits hold the cell of an optimal move and the next two the
+position's value plus one (0 if O wins with perfect play, 1 for a tie,
+2 if X wins). Every other entry is UNUSED.
+
+Usage: python book.py [output]
+"""
+
+import contextlib
+import os
+import sys
+
+import bitboard
+from transposition import TranspositionTable
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.book")
+MAGIC = b"TTTBOOK1"
+SIZE = 3 ** 9
+UNUSED = 0xFF
+
+
+def generate():
+    """
+    Solves every reachable position and returns the book's entries.
+    """
+    table = TranspositionTable()
+    table.solve()
+    entries = bytearray([UNUSED]) * SIZE
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        position = bitboard.index(x, o)
+        if entries[position] != UNUSED or bitboard.terminal(x, o):
+            continue
+        cell = table.best_move(x, o)
+        entries[position] = (table.value(x, o) + 1) << 4 | cell
+        stack.extend(bitboard.play(x, o, empty) for empty in bitboard.moves(x, o))
+    return bytes(entries)
+
+
+def save(entries, path=FILENAME):
+    """
+    Writes a book's entries to `path`.
+    """
+    with atomic_write(path) as f:
+        f.write(MAGIC)
+        f.write(entries)
+
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """
+    Opens a temporary file beside `path` for writing in binary, and moves
+    it over `path` once the block ends, so a half-written file is never read.
+    """
+    with open(path + ".tmp", "wb") as f:
+        yield f
+    os.replace(path + ".tmp", path)
+
+
+def load(path=FILENAME):
+    """
+    Returns a book's entries from `path`, or None if there is no valid book there.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if data[:len(MAGIC)] != MAGIC or len(data) != len(MAGIC) + SIZE:
+        return None
+    return data[len(MAGIC):]
+
+
+def lookup(entries, x, o):
+    """
+    Returns (cell, value) from the book for the board (x, o), or None if
+    the game is over or the board can't be reached.
+    """
+    entry = entries[bitboard.index(x, o)]
+    if entry == UNUSED:
+        return None
+    return entry & 0xF, (entry >> 4) - 1
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else FILENAME
+    entries = generate()
+    save(entries, path)
+    print(f"Wrote {sum(entry != UNUSED for entry in entries)} positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Engine for m,n,k-games: tictactoe on an m-by-n board, won by the first
+player to get k marks in a row.
+
+Boards are bitboards like bitboard.py's, one int per player with bit
+n * i + j for row i, column j, converted and checked for a win with its
+functions. Moves are chosen by iterative-deepening
+alpha-beta search (in negamax form) with a wall-clock budget: each depth
+is searched in full before the next, and when time runs out the best move
+of the deepest finished search is returned. Positions at the depth limit
+are scored by a heuristic over the open lines through the board.
+"""
+
+import time
+
+import bitboard
+
+# Score of a won position, less the plies it took, so faster wins score higher
+WIN = 10 ** 9
+
+# The clock is checked once per this many positions
+CHECK_EVERY = 1024
+
+# Boards with at least this many cells only search moves next to marks already made
+NEARBY_CELLS = 25
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class Engine():
+    """
+    Searches m,n,k-game positions on a board of `rows` by `columns`.
+    """
+
+    def __init__(self, rows, columns, k):
+        if k > max(rows, columns):
+            raise ValueError(f"{k} in a row doesn't fit on a {rows}x{columns} board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.full = (1 << (rows * columns)) - 1
+
+        # Every run of k cells in a row, column or diagonal, as a mask
+        self.lines = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        self.lines.append(sum(1 << self.cell(i + di * step, j + dj * step) for step in range(k)))
+        self.lines_through = [[line for line in self.lines if line >> cell & 1] for cell in range(rows * columns)]
+
+        # Cells next to each cell, so moves can be limited to those near the marks already made
+        self.around = []
+        for i in range(rows):
+            for j in range(columns):
+                mask = 0
+                for ni in range(max(0, i - 1), min(rows, i + 2)):
+                    for nj in range(max(0, j - 1), min(columns, j + 2)):
+                        mask |= 1 << self.cell(ni, nj)
+                self.around.append(mask)
+        self.nearby_only = rows * columns >= NEARBY_CELLS
+
+        # Cells nearest the centre first, since they lie on the most lines
+        centre_i, centre_j = (rows - 1) / 2, (columns - 1) / 2
+        self.order = sorted(range(rows * columns),
+                            key=lambda cell: abs(cell // columns - centre_i) + abs(cell % columns - centre_j))
+
+        # Value of an open line holding a given number of one player's marks
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+        self.nodes = 0
+        self.deadline = None
+
+    def cell(self, i, j):
+        return i * self.columns + j
+
+    def moves(self, me, opponent):
+        """
+        Returns the empty cells worth searching, in search order: those
+        next to a mark already made come first, and on large boards they
+        are the only ones searched, which can miss distant forks but keeps
+        the branching factor small.
+        """
+        taken = me | opponent
+        if not taken:
+            return list(self.order)
+        near = []
+        far = []
+        for cell in self.order:
+            if not taken >> cell & 1:
+                (near if taken & self.around[cell] else far).append(cell)
+        return near if self.nearby_only else near + far
+
+    def evaluate(self, me, opponent):
+        """
+        Scores a position for the player to move: each line still open to
+        only one player counts for that player, more so the fuller it is.
+        """
+        weights = self.weights
+        score = 0
+        for line in self.lines:
+            mine = me & line
+            theirs = opponent & line
+            if mine and not theirs:
+                score += weights[bin(mine).count("1")]
+            elif theirs and not mine:
+                score -= weights[bin(theirs).count("1")]
+        return score
+
+    def negamax(self, me, opponent, depth, alpha, beta, ply):
+        """
+        Returns the value of a position for the player to move, searched
+        `depth` plies deep, exact if it lies between `alpha` and `beta`.
+        """
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise OutOfTime
+        if (me | opponent) == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(me, opponent)
+
+        best = -WIN
+        for cell in self.moves(me, opponent):
+            bit = 1 << cell
+            mine = me | bit
+            if any(mine & line == line for line in self.lines_through[cell]):
+                return WIN - ply
+            value = -self.negamax(opponent, mine, depth - 1, -beta, -alpha, ply + 1)
+            if value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        return best
+
+    def best_move(self, x, o, budget):
+        """
+        Returns (cell, depth) for the player to move on (x, o): the best move
+        found within `budget` seconds, and the depth of the deepest search
+        finished. Returns (None, 0) if the game is over.
+        """
+        if (x | o) == self.full or bitboard.winner(x, o, self.lines) is not None:
+            return None, 0
+        me, opponent = (x, o) if bin(x).count("1") == bin(o).count("1") else (o, x)
+        self.deadline = time.perf_counter() + budget
+        self.nodes = 0
+
+        moves = self.moves(me, opponent)
+        best = moves[0]
+        finished = 0
+        for depth in range(1, bin(~(x | o) & self.full).count("1") + 1):
+            try:
+                value, move = self.search_root(me, opponent, moves, depth)
+            except OutOfTime:
+                break
+            best, finished = move, depth
+            # Search the best move first next time, so cut-offs come early
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(value) >= WIN - depth:
+                break
+        return best, finished
+
+    def search_root(self, me, opponent, moves, depth):
+        """
+        Returns (value, move) for the best of `moves` searched `depth` plies deep.
+        """
+        alpha, beta = -WIN - 1, WIN + 1
+        best = None
+        for cell in moves:
+            mine = me | 1 << cell
+            if any(mine & line == line for line in self.lines_through[cell]):
+                return WIN, cell
+            value = -self.negamax(opponent, mine, depth - 1, -beta, -alpha, 1)
+            if best is None or value > alpha:
+                best, alpha = cell, value
+        return alpha, best
+
+    def play(self, board, budget):
+        """
+        Returns the (i, j) move to make on a list-of-lists board within
+        `budget` seconds, or None if the game is over.
+        """
+        cell, _ = self.best_move(*bitboard.from_board(board), budget)
+        if cell is None:
+            return None
+        return divmod(cell, self.columns)
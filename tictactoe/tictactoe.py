@@ -3,7 +3,12 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+
+import alphabeta
+import bitboard
+import book
+import mnk
+import transposition
 
 X = "X"
 O = "O"
@@ -13,6 +18,18 @@ EMPTY = None
 import sys
 sys.setrecursionlimit(1500)
 
+# Minimax values of every position, filled in by the first call to minimax
+table = transposition.TranspositionTable()
+
+# Number of positions the last call to minimax visited
+nodes_visited = 0
+
+# Entries of the opening book, loaded by the first call to minimax
+opening_book = None
+
+# m,n,k-game engines, by (rows, columns, k)
+engines = dict()
+
 def initial_state():
     """
     Returns starting state of the board.
@@ -21,21 +38,9 @@ def initial_state():
             [EMPTY, EMPTY, EMPTY],
             [EMPTY, EMPTY, EMPTY]]
 
-# Checks which players turn it is
+# Checks which players turn it is, by comparing the number of X's and O's on the bitboard
 def player(board):
-    x_count = 0
-    o_count = 0
-    # As X always starts I can count numner of x's and o's and alternate player once one is added
-    for y in range(len(board)):
-        for x in range(len(board[y])):
-            if board[y][x] == X:
-                x_count += 1
-            if board[y][x] == O:
-                o_count += 1
-    if x_count > o_count:
-        return O
-    else:
-        return X
+    return bitboard.player(*bitboard.from_board(board))
 # Function that checks number of turns that have been played, using same logic as previous function
 def depth(board):
     x_num = 0
@@ -49,152 +54,110 @@ def depth(board):
 
     count = x_num + o_num
     return count
-# Finds all possible moves a player can make
+# Finds all possible moves a player can make, as [column, row] pairs
 def actions(board):
-    poss_moves = list()
-    for y in range(len(board)):
-        for x in range(len(board[y])):
-            if board[y][x] == EMPTY:
-                temp = [0] * 2
-                temp[0] = x
-                temp[1] = y
-                # Loops through entire list and checks for an empty index. If found, it appends the location to a list
-                poss_moves.append(temp)
-    return poss_moves
-    
+    return [[j, i] for i, j in bitboard.actions(*bitboard.from_board(board))]
 
 
-# Returns a deepcopy of the board with the included action now being filled with the player's symbol
+# Returns a new board with the included action now being filled with the player's symbol
 def result(board, action):
-    newBoard = copy.deepcopy(board)
-    # If space isn't free, program exits
-    if board[action[0]][action[1]] != EMPTY:
-        raise Exception
-    else:
-        newBoard[action[0]][action[1]] = player(board)
-    return newBoard
+    # If space isn't free, bitboard.result raises a ValueError
+    return bitboard.to_board(*bitboard.result(*bitboard.from_board(board), action))
 
-# Checks whole board for a diagonal, horizontal or vertical win condition
+# Checks the bitboard of each player against the masks of all 8 lines
 def winner(board):
-    countHo = [0] * 3
-    countHx = [0] * 3
-    countVo = [0] * 3
-    countVx = [0] * 3
-    RightDiagPos = [0] * 3
-    LeftDiagPos = [0] * 3
-    countDxR = [0] * 3
-    countDoR = [0] * 3
-    countDoL = [0] * 3
-    countDxL = [0] * 3
-    # Loops through whole board looking for indicators that a condition can't be true
-    # i.e If there is an O in a column, that column can't be an X win
-    for y in range(len(board)):
-        for x in range(len(board[y])):
-            if board[x][y] == O or board[x][y] == EMPTY:
-                countVx[y] += 1
-            if board[x][y] == X or board[x][y] == EMPTY:
-                countVo[y] += 1
-            if board[y][x] == O or board[y][x] == EMPTY:
-                countHx[y] += 1
-            if board[y][x] == X or board[y][x] == EMPTY:
-                countHo[y] += 1
-            # Diagonal characters are collected and checked seperately
-            if x == y:
-                RightDiagPos[x] = (board[y][x])
-            if y == x - 2 or x == y - 2 or y == 1 and x == 1:
-                LeftDiagPos[x] = (board[y][x])
-    # Same procedure for horizontals and verticals, but now for diagonals wins
-    for y in range(len(board)):
-        for x in range(len(board[y])):
-            if RightDiagPos[x] == O or RightDiagPos[x] == EMPTY:
-                countDxR[y] += 1
-            if LeftDiagPos[x] == O or LeftDiagPos[x] == EMPTY:
-                countDxL[y] += 1
-            if RightDiagPos[x] == X or RightDiagPos[x] == EMPTY:
-                countDoR[y] += 1
-            if LeftDiagPos[x] == X or LeftDiagPos[x] == EMPTY:
-                countDoL[y] += 1
-
-    # Finally the function concludes that if there is no presence of condradictory proofs, then the player must have won
-    if 0 in countHo  or 0 in countVo  or 0 in countDoR or 0 in countDoL:
-        return O
-    if 0 in countHx or 0 in countVx or 0 in countDxR or 0 in countDxL:
-        return X
-    else:
-        return None
+    return bitboard.winner(*bitboard.from_board(board))
 
 # Checks if game has concluded
 def terminal(board):
-    # Checks conditions that would mean an ending
-    if depth(board) == 9 or winner(board) == X or winner(board) == O:
-        return True
-    # If not found, game can't have finished
-    else:
-        return False
+    return bitboard.terminal(*bitboard.from_board(board))
 
 
 # If program has finished, a score is given to any winner
 def utility(board):
-    if winner(board) == X:
-        return 1
-    if winner(board) == O:
-        return -1
-    if winner(board) == None and terminal(board) ==  True:
-        return 0
-    elif terminal(board) == False:
+    x, o = bitboard.from_board(board)
+    if not bitboard.terminal(x, o):
+        return None
+    return bitboard.utility(x, o)
+
+# Decides which move is optimal, with one of four searches:
+# "book" reads the move from the opening book, "table" looks each reply up in the transposition table,
+# "alphabeta" runs an alpha-beta search with move ordering, and "exhaustive" scores every reply with BestScore
+# Every search runs on the bitboard, converted from the list-of-lists board once here
+def minimax(board, mode="book"):
+    global nodes_visited, opening_book
+    x, o = bitboard.from_board(board)
+    if mode == "book":
+        # The book is built in memory if it hasn't been written to disk with book.py
+        if opening_book is None:
+            opening_book = book.load() or book.generate()
+        entry = book.lookup(opening_book, x, o)
+        if entry is not None or bitboard.terminal(x, o):
+            nodes_visited = 1
+            return None if entry is None else divmod(entry[0], 3)
+        # Boards that can't come up in a game aren't in the book, so they are searched instead
+        mode = "table"
+    if mode == "alphabeta":
+        cell, nodes_visited = alphabeta.best_move(x, o)
+    elif mode == "exhaustive":
+        nodes_visited = 0
+        cell = exhaustive_move(x, o)
+    else:
+        # The whole game tree is solved once, symmetric positions sharing an entry, and every later call is lookups
+        if not table.values:
+            table.solve()
+        before = table.hits + table.misses
+        cell = table.best_move(x, o)
+        nodes_visited = table.hits + table.misses - before
+    if cell is None:
         return None
+    return divmod(cell, 3)
 
-# Decides which move is optimal according to another function
-def minimax(board):
-    # Decides whether or not to min or max score
-    if player(board) == X:
-        TopScore = -2
-    if player(board) == O:
-        TopScore = 2
-    # If player is X and move is the initial, then best move will always be the same as X starts
-    # Without this, the program would run very slowly as time to run increases exponentially due to the recursive algorithm
-    BestAction = [0] * 2
-    if depth(board) == 0 and player(board) == X:
-        BestAction[0] == 0
-        BestAction[1] == 0
-        return BestAction
-    moves = actions(board)
-    for x in range(len(moves)):
-        board[moves[x][1]][moves[x][0]] = player(board)
-        score = BestScore(board)
-        board[moves[x][1]][moves[x][0]] = EMPTY
-        # If calculated score of AI is greatest so far, then the corresponding move is now the best
-        # For X player who is maximising
-        if score > TopScore and player(board) == X:
-            TopScore = score
-            BestAction[0] = moves[x][1]
-            BestAction[1] = moves[x][0]
-        # Same thing as above but for minimising player
-        elif score < TopScore and player(board) == O:
+
+# Scores every possible move with BestScore and returns the best cell, or None if the game is over
+def exhaustive_move(x, o):
+    if bitboard.terminal(x, o):
+        return None
+    turn = bitboard.player(x, o)
+    TopScore = None
+    BestCell = None
+    for cell in bitboard.moves(x, o):
+        score = BestScore(*bitboard.play(x, o, cell))
+        if TopScore is None or (turn == X and score > TopScore) or (turn == O and score < TopScore):
             TopScore = score
-            BestAction[0] = moves[x][1]
-            BestAction[1] = moves[x][0]
+            BestCell = cell
+    return BestCell
+
 
-    return BestAction
+# Picks a move for an m,n,k-game: a board of any size, won with k in a row, searched
+# with iterative-deepening alpha-beta for at most `budget` seconds
+def mnk_move(board, k=3, budget=1.0):
+    size = (len(board), len(board[0]), k)
+    if size not in engines:
+        engines[size] = mnk.Engine(*size)
+    return engines[size].play(board, budget)
+
+
+# Returns the transposition table's hits, misses and number of stored positions
+def cache_info():
+    return table.cache_info()
 
 
 
 # The actual minmax algorithm with evaluates a score of the move recursively
-def BestScore(board):
+def BestScore(x, o):
+    global nodes_visited
+    nodes_visited += 1
     # If game is in a terminal state, the score of that board is returned
-    if terminal(board) == True:
-        return utility(board)
+    if bitboard.terminal(x, o):
+        return bitboard.utility(x, o)
     # Player X wishes to maximise the score
-    if player(board) == X:
+    if bitboard.player(x, o) == X:
         TopScore = float("-inf")
         # Gets all possible moves
-        moves = actions(board)
-        for u in range(len(moves)):
+        for cell in bitboard.moves(x, o):
             # Calculates a score for each move by calling itself until terminal state
-            board[moves[u][1]][moves[u][0]] = X
-            score = BestScore(board)
-            # Reset the board
-            board[moves[u][1]][moves[u][0]] = EMPTY
+            score = BestScore(x | 1 << cell, o)
             # Checks to see wether or not this move is maximizing the score
             if score > TopScore:
                 TopScore = score
@@ -202,13 +165,10 @@ def BestScore(board):
 
         return TopScore
     # Player O wishes to minimise the score
-    if player(board) == O:
+    else:
         TopScore = float("inf")
-        moves = actions(board)
-        for u in range(len(moves)):
-            board[moves[u][1]][moves[u][0]] = O
-            score = BestScore(board)
-            board[moves[u][1]][moves[u][0]] = EMPTY
+        for cell in bitboard.moves(x, o):
+            score = BestScore(x, o | 1 << cell)
             # Checks whether or not this move is the minimising move
             if score < TopScore:
                 TopScore = score
@@ -0,0 +1,96 @@
+"""
+Transposition-table minimax for tictactoe.
+
+Positions are bitboards (x, o), as in bitboard.py, stored under a canonical
+key: the smallest base-3 number of the board over its 8 rotations and
+reflections, so symmetric positions share one entry. The first search
+solves the whole game tree into the table, and every later search is a
+handful of lookups.
+"""
+
+from collections import namedtuple
+
+import bitboard
+from bitboard import X
+
+# Each symmetry lists, for every cell, the cell it is moved to
+SYMMETRIES = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0)
+)
+
+# Image of every 9-bit board under each symmetry
+IMAGES = tuple(
+    tuple(sum(1 << symmetry.index(cell) for cell in range(9) if bits >> cell & 1) for bits in range(1 << 9))
+    for symmetry in SYMMETRIES
+)
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "size"])
+
+
+class TranspositionTable():
+    """
+    Minimax values of tictactoe positions, from X's point of view:
+    1 if X wins with perfect play, -1 if O does, and 0 for a tie.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def value(self, x, o):
+        """
+        Returns the minimax value of the board (x, o).
+        """
+        key = canonical(x, o)
+        if key in self.values:
+            self.hits += 1
+            return self.values[key]
+        self.misses += 1
+
+        won = bitboard.winner(x, o)
+        if won is not None:
+            value = 1 if won == X else -1
+        elif (x | o) == bitboard.FULL:
+            value = 0
+        else:
+            values = [self.value(*bitboard.play(x, o, cell)) for cell in bitboard.moves(x, o)]
+            value = max(values) if bitboard.player(x, o) == X else min(values)
+        self.values[key] = value
+        return value
+
+    def best_move(self, x, o):
+        """
+        Returns the cell of an optimal move on the board (x, o), or None if
+        the game is over. Ties go to the lowest cell.
+        """
+        if bitboard.terminal(x, o):
+            return None
+        sign = 1 if bitboard.player(x, o) == X else -1
+        return max(bitboard.moves(x, o), key=lambda cell: (sign * self.value(*bitboard.play(x, o, cell)), -cell))
+
+    def solve(self):
+        """
+        Fills the table with every position reachable from the empty board.
+        """
+        self.value(0, 0)
+
+    def cache_info(self):
+        """
+        Returns the table's hits, misses and number of stored positions.
+        """
+        return CacheInfo(self.hits, self.misses, len(self.values))
+
+
+def canonical(x, o):
+    """
+    Returns the smallest base-3 number of a board over all its symmetries.
+    """
+    return min(bitboard.index(image[x], image[o]) for image in IMAGES)